@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Hashable, Iterable, Sequence
+
+TERMINAL_BASE = 1 << 31  # ranks at or above this are string terminators and sort after every symbol
+
+
+class Alphabet:
+    """
+    Maps input symbols to the integer ranks used as child keys and stored in `txt_total`
+    Terminal characters are `TERMINAL_BASE + string_number`, so they can never collide with a symbol rank
+    """
+
+    size: int = 0
+
+    def encode(self, txt) -> list[int]:
+        raise NotImplementedError
+
+    def encode_query(self, txt) -> list[int]:
+        # symbols the alphabet has never seen get rank -1, which matches no edge
+        return self.encode(txt)
+
+    def decode(self, ranks: Iterable[int]):
+        return list(ranks)
+
+    @staticmethod
+    def terminal(string_number: int = 0) -> int:
+        return TERMINAL_BASE + string_number
+
+    @staticmethod
+    def is_terminal(rank: int) -> bool:
+        return rank >= TERMINAL_BASE
+
+
+class CodePointAlphabet(Alphabet):
+    """
+    Ranks are Unicode code points, i.e. `ord()` of each character (the default)
+    With `fold_case` text and queries are lowercased as they are encoded, so no lowercased copy of the input is kept
+    """
+
+    size = 0x110000
+
+    def __init__(self, fold_case: bool = False) -> None:
+        self.fold_case = fold_case
+
+    def encode(self, txt: str) -> list[int]:
+        return list(map(ord, txt.lower() if self.fold_case else txt))
+
+    def decode(self, ranks: Iterable[int]) -> str:
+        return "".join(map(chr, ranks))
+
+
+class ByteAlphabet(Alphabet):
+    """
+    Ranks are raw byte values; `str` input is encoded as UTF-8 so offsets are byte offsets
+    `fold_case` lowercases ASCII letters as input is encoded
+    """
+
+    size = 256
+
+    def __init__(self, encoding: str = "utf-8", fold_case: bool = False) -> None:
+        self.encoding = encoding
+        self.fold_case = fold_case
+
+    def encode(self, txt: bytes | bytearray | memoryview | str) -> list[int]:
+        if isinstance(txt, str):
+            txt = txt.encode(self.encoding)
+        if self.fold_case:
+            txt = bytes(txt).lower()
+        return list(txt)
+
+    def decode(self, ranks: Iterable[int]) -> bytes:
+        return bytes(list(ranks))  # bytes() of an array('I') would copy its raw 4-byte items
+
+
+class UnicodeAlphabet(Alphabet):
+    """
+    Remaps the symbols actually seen to dense ranks 0..size-1 in order of first appearance
+    Symbols may be characters or any other hashable token (e.g. words), the table grows as new input is encoded
+    """
+
+    def __init__(self, symbols: Iterable[Hashable] = ()) -> None:
+        self.ranks: dict[Hashable, int] = {}
+        self.symbols: list[Hashable] = []
+        for symbol in symbols:
+            self._rank(symbol)
+
+    @property
+    def size(self) -> int:
+        return len(self.symbols)
+
+    def _rank(self, symbol: Hashable) -> int:
+        rank = self.ranks.get(symbol)
+        if rank is None:
+            rank = self.ranks[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return rank
+
+    def encode(self, txt: Iterable[Hashable]) -> list[int]:
+        return list(map(self._rank, txt))
+
+    def encode_query(self, txt: Iterable[Hashable]) -> list[int]:
+        return [self.ranks.get(symbol, -1) for symbol in txt]
+
+    def decode(self, ranks: Iterable[int]) -> list[Hashable]:
+        return [self.symbols[rank] for rank in ranks]
+
+
+class TokenAlphabet(Alphabet):
+    """Input is already a sequence of integer tokens in 0..size-1, e.g. word ids or 2-bit DNA codes"""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def encode(self, txt: Sequence[int]) -> list[int]:
+        ranks = list(txt)
+        for token in ranks:
+            if not 0 <= token < self.size:
+                raise ValueError(f"token {token} outside alphabet of size {self.size}")
+        return ranks
+
+    def encode_query(self, txt: Sequence[int]) -> list[int]:
+        return [token if 0 <= token < self.size else -1 for token in txt]
@@ -0,0 +1,78 @@
+"""
+Approximate substring search by depth-first branching over `Vertex.children`
+
+Both searches walk edges from the root the way the exact search does, but keep every branch still within the error
+budget, so queries sharing a prefix with the text share all of the work along that prefix. Each search yields
+`(locus, distance)` pairs: every leaf below `locus` starts an approximate occurrence at that distance.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterator, Sequence
+
+from UkkonensSuffixTree.alphabet import TERMINAL_BASE
+from UkkonensSuffixTree.vertex import Vertex
+
+
+def iter_mismatch_loci(root: Vertex, txt_of: Callable[[Vertex], Sequence[int]], pattern: Sequence[int],
+                       max_mismatches: int) -> Iterator[tuple[Vertex, int]]:
+    """Loci of substrings of length `len(pattern)` differing from it in at most `max_mismatches` positions"""
+    m = len(pattern)
+    if root.children is None: return
+    if m == 0:
+        yield root, 0
+        return
+    stack = [(root, 0, 0)]  # (vertex, pattern index, mismatches so far)
+    while stack:
+        v, i, mismatches = stack.pop()
+        for child in v.children:
+            txt = txt_of(child)
+            j, child_mismatches = i, mismatches
+            for txt_idx in range(child.parent_edge_start_index, child.parent_edge_end_index + 1):
+                rank = txt[txt_idx]
+                if rank >= TERMINAL_BASE: break
+                if rank != pattern[j]:
+                    child_mismatches += 1
+                    if child_mismatches > max_mismatches: break
+                j += 1
+                if j == m:
+                    yield child, child_mismatches
+                    break
+            else:
+                stack.append((child, j, child_mismatches))
+
+
+def iter_edit_loci(root: Vertex, txt_of: Callable[[Vertex], Sequence[int]], pattern: Sequence[int],
+                   max_edits: int) -> Iterator[tuple[Vertex, int]]:
+    """
+    Loci of suffixes with a prefix within edit distance `max_edits` of `pattern`, at the smallest such distance
+    A dynamic programming row is carried down each path; the row minimum never decreases with depth, so a branch is
+    cut once it exceeds the budget or can no longer improve on the best distance already found.
+    """
+    m = len(pattern)
+    if root.children is None: return
+    if m == 0:
+        yield root, 0
+        return
+    stack = [(root, list(range(m + 1)), m if m <= max_edits else None)]  # (vertex, DP row, best distance so far)
+    while stack:
+        v, row, best = stack.pop()
+        for child in v.children:
+            txt = txt_of(child)
+            child_row, child_best = row, best
+            for txt_idx in range(child.parent_edge_start_index, child.parent_edge_end_index + 1):
+                rank = txt[txt_idx]
+                if rank >= TERMINAL_BASE:
+                    if child_best is not None: yield child, child_best
+                    break
+                previous, child_row = child_row, [child_row[0] + 1]
+                for j in range(1, m + 1):
+                    child_row.append(min(previous[j - 1] + (pattern[j - 1] != rank), previous[j] + 1,
+                                         child_row[j - 1] + 1))
+                if child_row[m] <= max_edits and (child_best is None or child_row[m] < child_best):
+                    child_best = child_row[m]
+                lowest = min(child_row)
+                if lowest > max_edits or (child_best is not None and lowest >= child_best):
+                    if child_best is not None: yield child, child_best
+                    break
+            else:
+                stack.append((child, child_row, child_best))
@@ -0,0 +1,58 @@
+"""
+Throughput of `search_approximate` and `search_edit_distance` for k = 1..3, against a linear scan of the documents
+Run with `python -m UkkonensSuffixTree.benchmarks.approximate`
+"""
+import random
+import time
+
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+
+def typo_patterns(docs: list[str], number_of_patterns: int, length: int = 12, seed: int = 0) -> list[str]:
+    # substrings of the documents with one random substitution, as a user typing with a typo
+    rng = random.Random(seed)
+    patterns = []
+    for doc in rng.choices(docs, k=number_of_patterns):
+        start = rng.randrange(len(doc) - length)
+        pattern = list(doc[start:start + length])
+        pattern[rng.randrange(length)] = rng.choice("acgt")
+        patterns.append("".join(pattern))
+    return patterns
+
+
+def linear_scan(docs: list[str], pattern: str, max_mismatches: int) -> list[tuple[int, int, int]]:
+    matches = []
+    for string_number, doc in enumerate(docs):
+        for offset in range(len(doc) - len(pattern) + 1):
+            distance = sum(a != b for a, b in zip(pattern, doc[offset:offset + len(pattern)]))
+            if distance <= max_mismatches:
+                matches.append((string_number, offset, distance))
+    return matches
+
+
+def main() -> None:
+    docs = random_documents(20, 2_000)
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+    patterns = typo_patterns(docs, 200)
+
+    print(f"{'k':>3}{'scan q/s':>12}{'mismatch q/s':>14}{'edit q/s':>12}")
+    for k in (1, 2, 3):
+        start = time.perf_counter()
+        scanned = [linear_scan(docs, pattern, k) for pattern in patterns[:20]]
+        scan = 20 / (time.perf_counter() - start)
+        start = time.perf_counter()
+        approximate = [gst.search_approximate(pattern, k) for pattern in patterns]
+        mismatch = len(patterns) / (time.perf_counter() - start)
+        assert [sorted(matches) for matches in approximate[:20]] == scanned
+        start = time.perf_counter()
+        for pattern in patterns[:50]:
+            gst.search_edit_distance(pattern, k)
+        edit = 50 / (time.perf_counter() - start)
+        print(f"{k:>3}{scan:>12.1f}{mismatch:>14.1f}{edit:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+`GeneralisedSuffixTree.search_for_matches` against one `search_for_match` call per pattern
+Run with `python -m UkkonensSuffixTree.benchmarks.batch_queries`
+"""
+import random
+import time
+
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+
+def prefix_sharing_patterns(docs: list[str], number_of_patterns: int, seed: int = 0) -> list[str]:
+    # patterns are extensions of a small pool of stems, as in dictionary or autocomplete workloads
+    rng = random.Random(seed)
+    stems = [doc[i:i + 6] for doc in rng.choices(docs, k=50) for i in [rng.randrange(len(doc) - 12)]]
+    return [stem + "".join(rng.choice("acgt") for _ in range(rng.randint(0, 4)))
+            for stem in rng.choices(stems, k=number_of_patterns)]
+
+
+def main() -> None:
+    docs = random_documents(20, 2_000)
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+
+    print(f"{'patterns':>10}{'loop s':>10}{'batch s':>10}{'speedup':>10}")
+    for number_of_patterns in (1_000, 10_000, 50_000):
+        patterns = prefix_sharing_patterns(docs, number_of_patterns)
+        start = time.perf_counter()
+        looped = [gst.search_for_match(pat) for pat in patterns]
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        batched = gst.search_for_matches(patterns)
+        batch = time.perf_counter() - start
+        assert looped == batched
+        print(f"{number_of_patterns:>10}{loop:>10.3f}{batch:>10.3f}{loop / batch:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
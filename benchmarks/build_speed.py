@@ -0,0 +1,52 @@
+"""
+Characters per second of the fast Ukkonen build path against the method-per-step builder
+Both builds are checked to produce the same tree, suffix links included, before being timed
+Run with `python -m UkkonensSuffixTree.benchmarks.build_speed`
+"""
+import time
+
+from UkkonensSuffixTree.benchmarks.corpus import fibonacci_text, natural_text, random_documents, random_text
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.serialization import _columns_from_vertices
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+LENGTH = 50_000
+
+
+def build_single(txt: str, fast_build: bool) -> SuffixTree:
+    tree = SuffixTree(fast_build=fast_build)
+    tree.add_to_suffix_tree(txt)
+    return tree
+
+
+def build_generalised(docs: list[str], fast_build: bool) -> GeneralisedSuffixTree:
+    tree = GeneralisedSuffixTree(fast_build=fast_build)
+    for txt in docs:
+        tree.add_to_suffix_tree(txt)
+    return tree
+
+
+def chars_per_second(build, data, length: int) -> float:
+    start = time.perf_counter()
+    build(data)
+    return length / (time.perf_counter() - start)
+
+
+def main() -> None:
+    inputs = {
+        "random dna": (build_single, random_text(LENGTH)),
+        "random 26": (build_single, random_text(LENGTH, "abcdefghijklmnopqrstuvwxyz")),
+        "fibonacci": (build_single, fibonacci_text(LENGTH)),
+        "natural": (build_single, natural_text(LENGTH)),
+        "50 docs dna": (build_generalised, random_documents(50, LENGTH // 50)),
+    }
+    print(f"{'input':<16}{'reference c/s':>16}{'fast c/s':>12}{'speedup':>10}")
+    for name, (build, data) in inputs.items():
+        assert _columns_from_vertices(build(data, True).ROOT) == _columns_from_vertices(build(data, False).ROOT)
+        reference = chars_per_second(lambda d: build(d, False), data, LENGTH)
+        fast = chars_per_second(lambda d: build(d, True), data, LENGTH)
+        print(f"{name:<16}{reference:>16.0f}{fast:>12.0f}{fast / reference:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
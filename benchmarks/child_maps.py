@@ -0,0 +1,64 @@
+"""
+Child-map memory of the adaptive containers against one `ALPHA_SIZE + number_of_strings` slot table per internal
+vertex
+Run with `python -m UkkonensSuffixTree.benchmarks.child_maps`
+"""
+import random
+import sys
+import time
+from collections import Counter
+
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.dict import AlphabetDict
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+TOTAL_CHARACTERS = 40_000
+
+
+def internal_vertices(root):
+    stack = [root]
+    while stack:
+        v = stack.pop()
+        if v.children is not None:
+            yield v
+            stack.extend(v.children)
+
+
+def child_map_bytes(child_map) -> int:
+    if isinstance(child_map, AlphabetDict):
+        return sys.getsizeof(child_map) + sys.getsizeof(child_map.entries)
+    return sys.getsizeof(child_map) + sys.getsizeof(child_map.keys) + sys.getsizeof(child_map.values)
+
+
+def main() -> None:
+    print(f"{'strings':>8}{'internal':>10}{'dense MB':>12}{'adaptive MB':>13}{'build s':>9}{'query us':>10}  kinds")
+    for number_of_strings in (1, 100, 10_000):
+        docs = random_documents(number_of_strings, max(4, TOTAL_CHARACTERS // number_of_strings),
+                                "abcdefghijklmnopqrstuvwxyz")
+        start = time.perf_counter()
+        gst = GeneralisedSuffixTree(number_of_strings)
+        for n, txt in enumerate(docs):
+            gst.add_to_suffix_tree(txt, n)
+        build = time.perf_counter() - start
+
+        vertices = list(internal_vertices(gst.ROOT))
+        adaptive = sum(child_map_bytes(v.children) for v in vertices)
+        # the ALPHA_SIZE + number_of_strings slot layout is computed rather than built: at 10k strings it would not
+        # fit in memory
+        dense_entries = [None] * (AlphabetDict.ALPHA_SIZE + number_of_strings)
+        dense = len(vertices) * (sys.getsizeof(AlphabetDict()) + sys.getsizeof(dense_entries))
+        kinds = Counter(type(v.children).__name__ for v in vertices)
+
+        rng = random.Random(0)
+        patterns = [doc[i:i + 3] for doc in rng.choices(docs, k=2000) for i in [rng.randrange(len(doc))]]
+        start = time.perf_counter()
+        for pat in patterns:
+            gst._search_for_final_matching_vertex(pat)
+        query = (time.perf_counter() - start) / len(patterns) * 1e6
+
+        print(f"{number_of_strings:>8}{len(vertices):>10}{dense / 2**20:>12.1f}{adaptive / 2**20:>13.1f}"
+              f"{build:>9.2f}{query:>10.1f}  {dict(kinds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+`GeneralisedSuffixTree.remove_document` against rebuilding from the remaining documents, at 1%, 10% and 50% churn,
+and for one long repetitive document among random ones
+Run with `python -m UkkonensSuffixTree.benchmarks.churn`
+"""
+import random
+import time
+
+from UkkonensSuffixTree.benchmarks.batch_queries import prefix_sharing_patterns
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+
+def build(docs: list[str]) -> GeneralisedSuffixTree:
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+    return gst
+
+
+def main() -> None:
+    docs = random_documents(200, 500)
+    patterns = prefix_sharing_patterns(docs, 2_000)
+
+    print(f"{'churn':>8}{'removed':>10}{'remove s':>10}{'rebuild s':>11}{'speedup':>10}")
+    for churn in (0.01, 0.1, 0.5):
+        removed = set(random.Random(0).sample(range(len(docs)), max(1, int(len(docs) * churn))))
+        gst = build(docs)
+        start = time.perf_counter()
+        for string_number in removed:
+            gst.remove_document(string_number)
+        gst.compact()
+        remove = time.perf_counter() - start
+
+        # the rebuilt tree keeps the original string numbers, removed documents become empty strings
+        start = time.perf_counter()
+        rebuilt = build(["" if n in removed else txt for n, txt in enumerate(docs)])
+        rebuild = time.perf_counter() - start
+        assert gst.search_for_matches(patterns) == rebuilt.search_for_matches(patterns)
+        print(f"{churn:>8.0%}{len(removed):>10}{remove:>10.3f}{rebuild:>11.3f}{rebuild / remove:>10.2f}")
+
+    # repetitive text gives deep root-to-leaf paths, which removal must not walk once per suffix
+    length = 8_000
+    repetitive = {"a * n": "a" * length, "ab * n": "ab" * (length // 2),
+                  "log lines": "".join(f"INFO request {n % 7} served\n" for n in range(length))[:length]}
+    print(f"\n{'removed document':<18}{'length':>8}{'remove s':>10}{'rebuild s':>11}{'speedup':>10}")
+    for name, txt in repetitive.items():
+        gst = build(docs[:20] + [txt])
+        start = time.perf_counter()
+        gst.remove_document(20)
+        gst.compact()
+        remove = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rebuilt = build(docs[:20])
+        rebuild = time.perf_counter() - start
+        assert gst.search_for_matches(patterns) == rebuilt.search_for_matches(patterns)
+        print(f"{name:<18}{len(txt):>8}{remove:>10.3f}{rebuild:>11.3f}{rebuild / remove:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
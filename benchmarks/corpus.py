@@ -0,0 +1,32 @@
+import random
+
+WORDS = ("the", "of", "and", "to", "in", "is", "suffix", "tree", "string", "vertex", "edge", "pattern", "match",
+         "linear", "time", "construction", "ukkonen", "phase", "extension", "link")
+
+
+def random_text(length: int, alphabet: str = "acgt", seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def natural_text(length: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = []
+    total = 0
+    while total < length:
+        words.append(rng.choice(WORDS))
+        total += len(words[-1]) + 1
+    return " ".join(words)[:length]
+
+
+def random_documents(number_of_documents: int, document_length: int, alphabet: str = "acgt",
+                     seed: int = 0) -> list[str]:
+    return [random_text(document_length, alphabet, seed + n) for n in range(number_of_documents)]
+
+
+def fibonacci_text(length: int) -> str:
+    # highly repetitive: every prefix of the infinite Fibonacci word
+    previous, current = "a", "ab"
+    while len(current) < length:
+        previous, current = current, current + previous
+    return current[:length]
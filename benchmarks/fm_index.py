@@ -0,0 +1,58 @@
+"""
+Size and query latency of `FMIndex` at several suffix array sampling rates, against the suffix tree
+Run with `python -m UkkonensSuffixTree.benchmarks.fm_index`
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+from UkkonensSuffixTree.benchmarks.corpus import natural_text, random_text
+from UkkonensSuffixTree.benchmarks.memory import build_single, retained_bytes
+from UkkonensSuffixTree.fm_index import FMIndex
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+LENGTH = 50_000
+
+
+def latency_us(query, patterns: list[str]) -> float:
+    start = time.perf_counter()
+    for pat in patterns:
+        query(pat)
+    return (time.perf_counter() - start) / len(patterns) * 1e6
+
+
+def build_peak_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    print(f"{'input':<12}{'index':<10}{'B/char':>8}{'count us':>10}{'locate us':>11}")
+    for name, txt in {"random dna": random_text(LENGTH), "natural": natural_text(LENGTH)}.items():
+        rng = random.Random(0)
+        patterns = [txt[i:i + rng.randint(3, 8)] for i in (rng.randrange(LENGTH - 8) for _ in range(2_000))]
+
+        tree = build_single(SuffixTree, txt)()
+        tree_bytes = retained_bytes(build_single(SuffixTree, txt))
+        print(f"{name:<12}{'tree':<10}{tree_bytes / LENGTH:>8.1f}{latency_us(tree.count, patterns):>10.1f}"
+              f"{latency_us(tree.search_for_match, patterns):>11.1f}")
+        for sample_rate in (4, 16, 64):
+            fm = tree.to_fm_index(sample_rate)
+            assert all(sorted(fm.search_for_match(pat)) == sorted(tree.search_for_match(pat)) for pat in patterns[:50])
+            print(f"{'':<12}{f'fm/{sample_rate}':<10}{fm.nbytes() / LENGTH:>8.1f}"
+                  f"{latency_us(fm.count, patterns):>10.1f}{latency_us(fm.search_for_match, patterns):>11.1f}")
+
+        start = time.perf_counter()
+        FMIndex(txt)
+        build_seconds = time.perf_counter() - start
+        print(f"{'':<12}fm built from the text alone in {build_seconds:.2f} s, "
+              f"peak {build_peak_bytes(lambda: FMIndex(txt)) / LENGTH:.1f} B/char")
+
+
+if __name__ == "__main__":
+    main()
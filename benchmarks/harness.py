@@ -0,0 +1,468 @@
+"""
+Cross-implementation verification and benchmark harness
+
+Every build mode and index backend is built on each generated corpus, every query API it offers is checked against a
+brute-force oracle, and build time, query latency and peak memory are recorded. `--save` stores the results as JSON;
+`--compare` exits with status 1 when a check fails or a metric is worse than the stored run by more than `--tolerance`.
+Single-text implementations index the documents of a corpus concatenated. Peak memory is only recorded for
+implementations that build in the measuring process.
+Run with `python -m UkkonensSuffixTree.benchmarks.harness [--quick] [--save PATH] [--compare PATH]`
+"""
+import argparse
+import functools
+import gc
+import io
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from UkkonensSuffixTree import serialization
+from UkkonensSuffixTree.alphabet import ByteAlphabet, TokenAlphabet, UnicodeAlphabet
+from UkkonensSuffixTree.benchmarks.corpus import fibonacci_text, natural_text, random_documents, random_text
+from UkkonensSuffixTree.flat_suffix_tree import FlatGeneralisedSuffixTree, FlatSuffixTree
+from UkkonensSuffixTree.fm_index import FMIndex
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.parallel import ShardedGeneralisedSuffixTree, search_for_matches_parallel
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+METRICS = ("build_seconds", "query_us", "peak_bytes")
+
+
+def corpora(length: int) -> dict[str, list[str]]:
+    return {
+        "random-2": [random_text(length, "ab")],
+        "random-4": [random_text(length, "acgt")],
+        "random-26": [random_text(length, string.ascii_lowercase)],
+        "random-62": [random_text(length, string.ascii_letters + string.digits)],
+        "fibonacci": [fibonacci_text(length)],
+        "natural": [natural_text(length)],
+        "many-short": random_documents(length // 50, 50),
+        "few-long": random_documents(4, length // 4),
+    }
+
+
+# ---- implementations: name -> (generalised, build from a list of documents)
+
+def _single(cls, *enable: str, **kwargs):
+    def build(docs):
+        tree = cls(**kwargs)
+        for method in enable:
+            getattr(tree, method)()
+        tree.add_to_suffix_tree("".join(docs))
+        return tree
+    return build
+
+
+def _generalised(cls, *enable: str, **kwargs):
+    def build(docs):
+        tree = cls(**kwargs)
+        for method in enable:
+            getattr(tree, method)()
+        for txt in docs:
+            tree.add_to_suffix_tree(txt)
+        return tree
+    return build
+
+
+def _single_stream(docs):
+    tree = SuffixTree()
+    tree.build_from_stream(io.StringIO("".join(docs)), chunk_size=97)
+    return tree
+
+
+def _generalised_stream(docs):
+    tree = GeneralisedSuffixTree()
+    for txt in docs:
+        tree.build_from_stream(io.StringIO(txt), chunk_size=97)
+    return tree
+
+
+def _generalised_unicode(docs):
+    tree = GeneralisedSuffixTree(alphabet=UnicodeAlphabet())
+    for txt in docs:
+        tree.add_to_suffix_tree(txt)
+    return tree
+
+
+def _generalised_tokens(docs):
+    # queried with code points too, see `as_query`
+    tree = GeneralisedSuffixTree(alphabet=TokenAlphabet(128))
+    for txt in docs:
+        tree.add_to_suffix_tree(list(map(ord, txt)))
+    return tree
+
+
+def _generalised_removals(docs):
+    # every document follows a removed one holding part of its text, so edges labelled with removed text are
+    # relabelled; the live documents keep odd string numbers, see `indexed_documents`
+    tree = GeneralisedSuffixTree()
+    for txt in docs:
+        tree.add_to_suffix_tree(txt[len(txt) // 3:len(txt) * 2 // 3] + "#")
+        tree.add_to_suffix_tree(txt)
+    for string_number in range(0, len(tree.txt_total), 2):
+        tree.remove_document(string_number)
+    tree.compact()
+    return tree
+
+
+def _mapped(build, directory: str):
+    def load(docs):
+        path = os.path.join(directory, "index.ukst")
+        serialization.save(build(docs), path)
+        return serialization.load(path)
+    return load
+
+
+def implementations(directory: str) -> dict:
+    return {
+        "SuffixTree": (False, _single(SuffixTree)),
+        "SuffixTree/reference": (False, _single(SuffixTree, fast_build=False)),
+        "SuffixTree/stream": (False, _single_stream),
+        "SuffixTree/cache": (False, _single(SuffixTree, "enable_cache")),
+        "SuffixTree/stats": (False, _single(SuffixTree, "enable_stats")),
+        "SuffixTree/bytes": (False, _single(SuffixTree, alphabet=ByteAlphabet("ascii"))),
+        "FlatSuffixTree": (False, _single(FlatSuffixTree)),
+        "FlatSuffixTree/mmap": (False, _mapped(_single(SuffixTree), directory)),
+        "SuffixArrayIndex": (False, lambda docs: _single(SuffixTree)(docs).to_suffix_array_index()),
+        "FMIndex": (False, lambda docs: FMIndex("".join(docs))),
+        "GeneralisedSuffixTree": (True, _generalised(GeneralisedSuffixTree)),
+        "GeneralisedSuffixTree/reference": (True, _generalised(GeneralisedSuffixTree, fast_build=False)),
+        "GeneralisedSuffixTree/stream": (True, _generalised_stream),
+        "GeneralisedSuffixTree/cache": (True, _generalised(GeneralisedSuffixTree, "enable_cache")),
+        "GeneralisedSuffixTree/stats": (True, _generalised(GeneralisedSuffixTree, "enable_stats")),
+        "GeneralisedSuffixTree/unicode": (True, _generalised_unicode),
+        "GeneralisedSuffixTree/tokens": (True, _generalised_tokens),
+        "GeneralisedSuffixTree/removals": (True, _generalised_removals),
+        "FlatGeneralisedSuffixTree": (True, _generalised(FlatGeneralisedSuffixTree)),
+        "FlatGeneralisedSuffixTree/mmap": (True, _mapped(_generalised(GeneralisedSuffixTree), directory)),
+        "GeneralisedSuffixArrayIndex": (True, lambda docs: _generalised(GeneralisedSuffixTree)(docs)
+                                        .to_suffix_array_index()),
+        "Sharded/2": (True, lambda docs: ShardedGeneralisedSuffixTree(docs, 2)),
+    }
+
+
+# ---- brute-force oracles over (string number, text) pairs of the indexed documents
+
+def indexed_documents(index, generalised: bool, docs: list[str]) -> tuple[tuple[int, str], ...]:
+    if not generalised: return ((0, "".join(docs)),)
+    removed = getattr(index, "removed_strings", None)
+    if not removed: return tuple(enumerate(docs))
+    live = [string_number for string_number in range(len(docs) + len(removed)) if string_number not in removed]
+    return tuple(zip(live, docs))
+
+
+def as_query(index, pattern: str):
+    # a token alphabet index is given the code points of the patterns
+    return list(map(ord, pattern)) if isinstance(getattr(index, "alphabet", None), TokenAlphabet) else pattern
+
+
+def as_text(decoded) -> str:
+    if isinstance(decoded, str): return decoded
+    if isinstance(decoded, bytes): return decoded.decode("ascii")
+    return "".join(symbol if isinstance(symbol, str) else chr(symbol) for symbol in decoded)
+
+
+@functools.cache
+def occurrences(docs: tuple[tuple[int, str], ...], pattern: str) -> list[tuple[int, int]]:
+    matches = []
+    for string_number, doc in docs:
+        offset = doc.find(pattern)
+        while offset != -1:
+            matches.append((string_number, offset))
+            offset = doc.find(pattern, offset + 1)
+    if pattern == "":
+        matches += [(string_number, len(doc)) for string_number, doc in docs]
+    return matches
+
+
+@functools.cache
+def longest_prefix(docs: tuple[tuple[int, str], ...], pattern: str) -> int:
+    lo, hi = 0, len(pattern)  # being a substring is monotone in the prefix length
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if any(pattern[:mid] in doc for _, doc in docs):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+@functools.cache
+def mismatches(docs: tuple[tuple[int, str], ...], pattern: str, max_mismatches: int) -> list[tuple[int, int, int]]:
+    matches = []
+    for string_number, doc in docs:
+        for offset in range(len(doc) - len(pattern) + 1):
+            distance = sum(a != b for a, b in zip(pattern, doc[offset:offset + len(pattern)]))
+            if distance <= max_mismatches:
+                matches.append((string_number, offset, distance))
+    return matches
+
+
+@functools.cache
+def edit_distances(docs: tuple[tuple[int, str], ...], pattern: str, max_edits: int) -> list[tuple[int, int, int]]:
+    matches = []
+    reversed_pattern = pattern[::-1]
+    for string_number, doc in docs:
+        # Sellers' algorithm over the reversed text: column[i] is the smallest distance of reversed_pattern[:i] to a
+        # substring ending at the current position, i.e. of pattern[-i:] to a substring starting at `offset`
+        column = list(range(len(pattern) + 1))
+        distances = [len(pattern)] * (len(doc) + 1)
+        for offset in range(len(doc) - 1, -1, -1):
+            diagonal, column[0] = column[0], 0
+            for i in range(1, len(column)):
+                distance = min(column[i] + 1, column[i - 1] + 1, diagonal + (reversed_pattern[i - 1] != doc[offset]))
+                diagonal, column[i] = column[i], distance
+            distances[offset] = column[-1]
+        matches += [(string_number, offset, distance) for offset, distance in enumerate(distances)
+                    if distance <= max_edits]
+    return matches
+
+
+def _has_repeat(txt: str, length: int) -> bool:
+    first = {}  # by hash, so no substring is kept for every offset
+    for offset in range(len(txt) - length + 1):
+        substring = txt[offset:offset + length]
+        seen = first.setdefault(hash(substring), offset)
+        if seen != offset and txt.startswith(substring, seen): return True
+    return False
+
+
+@functools.cache
+def longest_repeat_length(txt: str) -> int:
+    lo, hi = 0, max(len(txt) - 1, 0)  # repeating is monotone in the length
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _has_repeat(txt, mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _shared_by(docs: tuple[tuple[int, str], ...], length: int, k_of_n: int) -> bool:
+    documents = {}
+    for _, doc in docs:
+        for key in {hash(doc[offset:offset + length]) for offset in range(len(doc) - length + 1)}:
+            documents[key] = documents.get(key, 0) + 1
+    return any(count >= k_of_n for count in documents.values())
+
+
+@functools.cache
+def longest_common_length(docs: tuple[tuple[int, str], ...], k_of_n: int) -> int:
+    lo, hi = 0, max(len(doc) for _, doc in docs)  # being shared is monotone in the length
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _shared_by(docs, mid, k_of_n):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_prefix_length(a: str, a_start: int, b: str, b_start: int) -> int:
+    limit = min(len(a) - a_start, len(b) - b_start)
+    step = 1  # gallop, then bisect, so long common prefixes are compared in slices
+    while step <= limit and a.startswith(b[b_start:b_start + step], a_start):
+        step *= 2
+    lo, hi = step // 2, min(step, limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.startswith(b[b_start:b_start + mid], a_start):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def suffix_order_holds(index, docs: tuple[tuple[int, str], ...], suffixes: list[tuple[int, int]], lcp) -> bool:
+    """Whether `suffixes` lists every (string number, start) once in rank order, with `lcp` between neighbours"""
+    if sorted(suffixes) != [(n, start) for n, doc in docs for start in range(len(doc) + 1)]: return False
+    if lcp[0] != 0: return False
+    txt_of = dict(docs)
+    for r in range(1, len(suffixes)):
+        (a_number, a), (b_number, b) = suffixes[r - 1], suffixes[r]
+        a_txt, b_txt = txt_of[a_number], txt_of[b_number]
+        length = _common_prefix_length(a_txt, a, b_txt, b)
+        if lcp[r] != length: return False
+        a_ended, b_ended = a + length == len(a_txt), b + length == len(b_txt)
+        if a_ended or b_ended:
+            # terminators sort after every symbol, in string number order
+            in_order = b_ended and (not a_ended or a_number < b_number)
+        else:
+            a_rank, b_rank = (index.alphabet.encode_query(as_query(index, txt[start + length]))[0]
+                              for txt, start in ((a_txt, a), (b_txt, b)))
+            in_order = a_rank < b_rank
+        if not in_order: return False
+    return True
+
+
+def query_patterns(docs: list[str], number_of_patterns: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    patterns = []
+    for doc in rng.choices([doc for doc in docs if doc], k=number_of_patterns):
+        start = rng.randrange(len(doc))
+        patterns.append(doc[start:start + rng.randint(1, 10)])
+    patterns += ["".join(rng.choices(string.printable[:94], k=rng.randint(1, 6))) for _ in range(10)]
+    return patterns
+
+
+# ---- checks
+
+def check(index, generalised: bool, docs: list[str], patterns: list[str]) -> list[str]:
+    """Names of the failed checks, comparing every query API the index offers with the oracle"""
+    indexed = indexed_documents(index, generalised, docs)
+    as_found = (lambda matches: sorted(matches)) if generalised else (lambda matches: sorted((0, o) for o in matches))
+    query = functools.partial(as_query, index)
+    failures = set()
+    expected = {pattern: occurrences(indexed, pattern) for pattern in patterns}
+
+    for _ in range(1 if getattr(index, "cache", None) is None else 2):  # the second round is answered from the cache
+        for pattern in patterns:
+            if as_found(index.search_for_match(query(pattern))) != expected[pattern]:
+                failures.add("search_for_match")
+            if hasattr(index, "iter_matches") and as_found(index.iter_matches(query(pattern))) != expected[pattern]:
+                failures.add("iter_matches")
+            if hasattr(index, "count") and index.count(query(pattern)) != len(expected[pattern]):
+                failures.add("count")
+            if hasattr(index, "document_frequency") and \
+                    index.document_frequency(query(pattern)) != len({n for n, _ in expected[pattern]}):
+                failures.add("document_frequency")
+            if hasattr(index, "is_substring") and index.is_substring(query(pattern)) != bool(expected[pattern]):
+                failures.add("is_substring")
+            if hasattr(index, "longest_prefix_match") and \
+                    index.longest_prefix_match(query(pattern)) != longest_prefix(indexed, pattern):
+                failures.add("longest_prefix_match")
+    expected_batch = [expected[pattern] for pattern in patterns]
+    if hasattr(index, "search_for_matches"):
+        if [as_found(matches) for matches in index.search_for_matches(list(map(query, patterns)))] != expected_batch:
+            failures.add("search_for_matches")
+    if not hasattr(index, "close"):  # an index already serving from worker processes is not shared again
+        found = search_for_matches_parallel(index, list(map(query, patterns)), 2)
+        if [as_found(matches) for matches in found] != expected_batch:
+            failures.add("search_for_matches_parallel")
+    if hasattr(index, "matching_statistics"):
+        txt = patterns[0] + "".join(patterns[1:20])
+        if list(index.matching_statistics(query(txt))) != [longest_prefix(indexed, txt[i:]) for i in range(len(txt))]:
+            failures.add("matching_statistics")
+
+    for pattern in patterns[:5]:
+        if hasattr(index, "search_approximate") and \
+                sorted(index.search_approximate(query(pattern), 1)) != mismatches(indexed, pattern, 1):
+            failures.add("search_approximate")
+        if hasattr(index, "search_edit_distance") and \
+                sorted(index.search_edit_distance(query(pattern), 1)) != edit_distances(indexed, pattern, 1):
+            failures.add("search_edit_distance")
+    if hasattr(index, "search_for_suffix_match"):
+        (_, txt), = indexed
+        for pattern in [txt[len(txt) - length:] for length in range(6)] + patterns:
+            start = index.search_for_suffix_match(query(pattern))
+            # the start of the edge into the suffix's leaf, somewhere along the suffix
+            if (start is not None) != txt.endswith(pattern) or \
+                    start is not None and not len(txt) - len(pattern) <= start <= len(txt):
+                failures.add("search_for_suffix_match")
+    if hasattr(index, "longest_repeated_substring"):
+        (_, txt), = indexed
+        repeat = as_text(index.longest_repeated_substring())
+        if len(repeat) != longest_repeat_length(txt) or repeat and txt.find(repeat, txt.find(repeat) + 1) == -1:
+            failures.add("longest_repeated_substring")
+    if hasattr(index, "longest_common_substring"):
+        for k_of_n in {len(indexed), min(2, len(indexed))}:
+            common = as_text(index.longest_common_substring(k_of_n))
+            if len(common) != longest_common_length(indexed, k_of_n) or \
+                    sum(common in doc for _, doc in indexed) < k_of_n:
+                failures.add("longest_common_substring")
+    if hasattr(index, "suffix_array"):
+        *string_numbers, starts, lcp = index.suffix_array()
+        suffixes = list(zip(string_numbers[0], starts)) if generalised else [(0, start) for start in starts]
+        if not suffix_order_holds(index, indexed, suffixes, lcp):
+            failures.add("suffix_array")
+    return sorted(failures)
+
+
+# ---- measurements
+
+def measure(build, docs: list[str], patterns: list[str]) -> tuple[object, dict]:
+    gc.collect()
+    start = time.perf_counter()
+    index = build(docs)
+    build_seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    traced = build(docs)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(traced, "close"):
+        traced.close()
+        peak_bytes = None  # built in worker processes, which are not traced
+    del traced
+
+    queries = [as_query(index, pattern) for pattern in patterns]
+    start = time.perf_counter()
+    for pattern in queries:
+        index.search_for_match(pattern)
+    query_us = (time.perf_counter() - start) / len(patterns) * 1e6
+    return index, {"build_seconds": build_seconds, "query_us": query_us, "peak_bytes": peak_bytes}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for corpus, rows in results["results"].items():
+        for name, row in rows.items():
+            old = baseline["results"].get(corpus, {}).get(name)
+            if old is None: continue
+            for metric in METRICS:
+                if row[metric] is None or old[metric] is None: continue
+                if row[metric] > old[metric] * (1 + tolerance):
+                    regressions.append(f"{corpus} {name} {metric}: {old[metric]:.4g} -> {row[metric]:.4g}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="verify every implementation against a brute-force oracle and "
+                                                 "record build time, query latency and peak memory")
+    parser.add_argument("--quick", action="store_true", help="small corpora, for a fast correctness pass")
+    parser.add_argument("--save", metavar="PATH", help="store the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="fail if worse than the results stored at PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression per metric")
+    args = parser.parse_args()
+
+    length, number_of_patterns = (2_000, 50) if args.quick else (20_000, 200)
+    results = {"length": length, "python": sys.version.split()[0], "results": {}}
+    failed = False
+
+    print(f"{'corpus':<12}{'implementation':<34}{'build s':>9}{'query us':>10}{'peak KiB':>10}  failures")
+    with tempfile.TemporaryDirectory() as directory:
+        for corpus, docs in corpora(length).items():
+            patterns = query_patterns(docs, number_of_patterns)
+            rows = results["results"][corpus] = {}
+            for name, (generalised, build) in implementations(directory).items():
+                index, row = measure(build, docs, patterns)
+                row["failures"] = check(index, generalised, docs, patterns)
+                if hasattr(index, "close"): index.close()
+                del index
+                rows[name] = row
+                failed |= bool(row["failures"])
+                peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 1024:.0f}"
+                print(f"{corpus:<12}{name:<34}{row['build_seconds']:>9.3f}{row['query_us']:>10.1f}{peak:>10}  "
+                      f"{', '.join(row['failures']) or '-'}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("regression:", regression)
+        failed |= bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+`matching_statistics` by suffix links against the naive loop restarting a longest-prefix walk from the root per offset
+Run with `python -m UkkonensSuffixTree.benchmarks.matching_statistics`
+"""
+import time
+from array import array
+
+from UkkonensSuffixTree.benchmarks.corpus import natural_text, random_documents, random_text
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.matching import longest_prefix_length
+
+
+def main() -> None:
+    cases = {"random": (random_documents(20, 2_000), random_text(5_000, seed=99)),
+             "natural": ([natural_text(5_000, seed=n) for n in range(8)], natural_text(5_000, seed=99))}
+
+    print(f"{'corpus':>8}{'query len':>11}{'naive s':>10}{'links s':>10}{'speedup':>10}{'mean match':>12}")
+    for name, (docs, query) in cases.items():
+        gst = GeneralisedSuffixTree()
+        for txt in docs:
+            gst.add_to_suffix_tree(txt)
+
+        # the naive loop gets the query encoded once and zero-copy suffixes, so only the walks are compared
+        ranks = memoryview(array('q', gst.alphabet.encode_query(query)))
+        start = time.perf_counter()
+        naive = [longest_prefix_length(gst.ROOT, lambda v: gst.txt_total[v.string_number], ranks[i:])
+                 for i in range(len(ranks))]
+        naive_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        lengths = gst.matching_statistics(query)
+        links_seconds = time.perf_counter() - start
+        assert list(lengths) == naive
+        print(f"{name:>8}{len(query):>11}{naive_seconds:>10.3f}{links_seconds:>10.3f}"
+              f"{naive_seconds / links_seconds:>10.2f}{sum(lengths) / len(lengths):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
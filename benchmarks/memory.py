@@ -0,0 +1,62 @@
+"""
+Retained memory per input character of the object-graph trees against the flat array-backed trees
+Run with `python -m UkkonensSuffixTree.benchmarks.memory`
+"""
+import gc
+import tracemalloc
+
+from UkkonensSuffixTree.benchmarks.corpus import natural_text, random_documents, random_text
+from UkkonensSuffixTree.flat_suffix_tree import FlatGeneralisedSuffixTree, FlatSuffixTree
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+
+def retained_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    tree = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return current
+
+
+def build_single(cls, txt):
+    def build():
+        tree = cls()
+        tree.add_to_suffix_tree(txt)
+        return tree
+    return build
+
+
+def build_generalised(cls, docs, *args):
+    def build():
+        tree = cls(*args)
+        for n, txt in enumerate(docs):
+            tree.add_to_suffix_tree(txt, n)
+        return tree
+    return build
+
+
+def main() -> None:
+    length = 20_000
+    print(f"{'input':<24}{'object B/char':>16}{'flat B/char':>16}{'ratio':>10}")
+    inputs = {"random dna": random_text(length), "random 26": random_text(length, "abcdefghijklmnopqrstuvwxyz"),
+              "natural": natural_text(length)}
+    for name, txt in inputs.items():
+        obj = retained_bytes(build_single(SuffixTree, txt)) / length
+        flat = retained_bytes(build_single(FlatSuffixTree, txt)) / length
+        print(f"{name:<24}{obj:>16.1f}{flat:>16.1f}{obj / flat:>10.1f}")
+
+    # many short documents put one terminator leaf per document under the root
+    for name, docs in {"20 docs dna": random_documents(20, length // 20),
+                       "8000 docs x 8 dna": random_documents(8_000, 8)}.items():
+        total = sum(map(len, docs))
+        obj = retained_bytes(build_generalised(GeneralisedSuffixTree, docs, len(docs))) / total
+        flat = retained_bytes(build_generalised(FlatGeneralisedSuffixTree, docs)) / total
+        print(f"{name:<24}{obj:>16.1f}{flat:>16.1f}{obj / flat:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Query throughput of `search_for_matches_parallel` as the number of worker processes grows
+Run with `python -m UkkonensSuffixTree.benchmarks.parallel_queries`
+"""
+import os
+import time
+
+from UkkonensSuffixTree.benchmarks.batch_queries import prefix_sharing_patterns
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.parallel import search_for_matches_parallel
+
+
+def main() -> None:
+    docs = random_documents(50, 2_000)
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+    patterns = prefix_sharing_patterns(docs, 50_000)
+
+    print(f"{os.cpu_count()} cpus")
+    print(f"{'workers':>8}{'seconds':>10}{'patterns/s':>14}{'speedup':>10}")
+    expected = None
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        results = search_for_matches_parallel(gst, patterns, workers)
+        elapsed = time.perf_counter() - start
+        expected = results if expected is None else expected
+        assert results == expected
+        baseline = elapsed if baseline is None else baseline
+        print(f"{workers:>8}{elapsed:>10.3f}{len(patterns) / elapsed:>14.0f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Skewed query traffic with and without `enable_cache`, a few hundred hot patterns making up most queries
+Run with `python -m UkkonensSuffixTree.benchmarks.query_cache`
+"""
+import random
+import time
+
+from UkkonensSuffixTree.benchmarks.batch_queries import prefix_sharing_patterns
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+
+def skewed_traffic(patterns: list[str], number_of_queries: int, seed: int = 0) -> list[str]:
+    # Zipf-like popularity: the pattern at rank r is requested with weight 1 / r
+    rng = random.Random(seed)
+    return rng.choices(patterns, weights=[1 / rank for rank in range(1, len(patterns) + 1)], k=number_of_queries)
+
+
+def main() -> None:
+    docs = random_documents(20, 2_000)
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+    traffic = skewed_traffic(prefix_sharing_patterns(docs, 5_000), 50_000)
+
+    start = time.perf_counter()
+    uncached = [gst.search_for_match(pattern) for pattern in traffic]
+    baseline = time.perf_counter() - start
+
+    print(f"{'max entries':>12}{'s':>10}{'speedup':>10}{'hit rate':>10}{'prefix hits':>13}")
+    print(f"{'off':>12}{baseline:>10.3f}{1:>10.2f}")
+    for max_entries in (100, 500, 2_000):
+        cache = gst.enable_cache(max_entries)
+        start = time.perf_counter()
+        cached = [gst.search_for_match(pattern) for pattern in traffic]
+        elapsed = time.perf_counter() - start
+        assert cached == uncached
+        stats = cache.stats()
+        print(f"{max_entries:>12}{elapsed:>10.3f}{baseline / elapsed:>10.2f}{stats['hit_rate']:>10.2f}"
+              f"{stats['prefix_hits']:>13}")
+        gst.cache = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Build time of `ShardedGeneralisedSuffixTree` as the number of shards grows, against one `GeneralisedSuffixTree`
+Run with `python -m UkkonensSuffixTree.benchmarks.sharded_build`
+"""
+import os
+import time
+
+from UkkonensSuffixTree.benchmarks.batch_queries import prefix_sharing_patterns
+from UkkonensSuffixTree.benchmarks.corpus import random_documents
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.parallel import ShardedGeneralisedSuffixTree
+
+
+def main() -> None:
+    docs = random_documents(400, 1_000)
+    patterns = prefix_sharing_patterns(docs, 5_000)
+
+    start = time.perf_counter()
+    gst = GeneralisedSuffixTree()
+    for txt in docs:
+        gst.add_to_suffix_tree(txt)
+    baseline = time.perf_counter() - start
+    expected = [sorted(matches) for matches in gst.search_for_matches(patterns)]
+    del gst
+
+    print(f"{os.cpu_count()} cpus")
+    print(f"{'shards':>8}{'build s':>10}{'speedup':>10}{'query s':>10}")
+    print(f"{'single':>8}{baseline:>10.3f}{1:>10.2f}")
+    for shards in (1, 2, 4, 8):
+        start = time.perf_counter()
+        with ShardedGeneralisedSuffixTree(docs, shards) as sharded:
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            results = sharded.search_for_matches(patterns)
+            query = time.perf_counter() - start
+        assert results == expected
+        print(f"{shards:>8}{build:>10.3f}{baseline / build:>10.2f}{query:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Memory and query latency of `SuffixArrayIndex` against the suffix tree it was exported from
+Run with `python -m UkkonensSuffixTree.benchmarks.suffix_array`
+"""
+import random
+import time
+
+from UkkonensSuffixTree.benchmarks.corpus import natural_text, random_text
+from UkkonensSuffixTree.benchmarks.memory import build_single, retained_bytes
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+LENGTH = 50_000
+
+
+def latency_us(index, patterns: list[str]) -> float:
+    start = time.perf_counter()
+    for pat in patterns:
+        index.search_for_match(pat)
+    return (time.perf_counter() - start) / len(patterns) * 1e6
+
+
+def main() -> None:
+    print(f"{'input':<12}{'tree B/char':>13}{'SA B/char':>11}{'tree us':>10}{'SA us':>8}")
+    for name, txt in {"random dna": random_text(LENGTH), "natural": natural_text(LENGTH)}.items():
+        tree_bytes = retained_bytes(build_single(SuffixTree, txt))
+        tree = build_single(SuffixTree, txt)()
+        index_bytes = retained_bytes(tree.to_suffix_array_index)
+
+        rng = random.Random(0)
+        patterns = [txt[i:i + rng.randint(3, 8)] for i in (rng.randrange(LENGTH - 8) for _ in range(5_000))]
+        index = tree.to_suffix_array_index()
+        for pat in patterns[:100]:
+            assert index.search_for_match(pat) == tree.search_for_match(pat)
+        print(f"{name:<12}{tree_bytes / LENGTH:>13.1f}{index_bytes / LENGTH:>11.1f}"
+              f"{latency_us(tree, patterns):>10.1f}{latency_us(index, patterns):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
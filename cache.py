@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sys
+from collections import Counter, OrderedDict
+from typing import Hashable
+
+
+class QueryCache:
+    """
+    LRU cache of per-pattern query results (match lists, counts and match loci), bounded by number of entries and/or
+    approximate bytes. Entries belong to one tree version and are dropped as soon as the tree reports a newer one.
+    """
+
+    def __init__(self, max_entries: int | None = 1024, max_bytes: int | None = None) -> None:
+        self.max_entries: int | None = max_entries
+        self.max_bytes: int | None = max_bytes
+        self.entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self.nbytes: int = 0
+        self.version: int = 0
+        self._locus_lengths: Counter[int] = Counter()  # pattern lengths of the cached loci, for prefix lookups
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.prefix_hits: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def sync(self, version: int) -> None:
+        if version != self.version:
+            self.clear()
+            self.version = version
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._locus_lengths.clear()
+        self.nbytes = 0
+
+    def get(self, key: Hashable, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value) -> None:
+        if key in self.entries:
+            self._discard(key)
+        nbytes = sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, list):
+            nbytes += sum(map(sys.getsizeof, value))
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        if key[0] == "locus":
+            self._locus_lengths[len(key[1])] += 1
+        while self.entries and ((self.max_entries is not None and len(self.entries) > self.max_entries)
+                                or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            self._discard(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        _, nbytes = self.entries.pop(key)
+        self.nbytes -= nbytes
+        if key[0] == "locus":
+            self._locus_lengths[len(key[1])] -= 1
+            if not self._locus_lengths[len(key[1])]:
+                del self._locus_lengths[len(key[1])]
+
+    def longest_cached_prefix(self, ranks: tuple[int, ...]) -> tuple[int, object]:
+        """Length and locus of the longest prefix of `ranks` with a cached locus, (0, None) if there is none"""
+        for length in sorted(self._locus_lengths, reverse=True):
+            if length > len(ranks): continue
+            entry = self.entries.get(("locus", ranks[:length]))
+            if entry is not None:
+                self.prefix_hits += 1
+                self.entries.move_to_end(("locus", ranks[:length]))
+                return length, entry[0]
+        return 0, None
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self.entries), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "prefix_hits": self.prefix_hits,
+                "evictions": self.evictions, "invalidations": self.invalidations}
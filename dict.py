@@ -1,23 +1,47 @@
+from bisect import bisect_left
+
+from UkkonensSuffixTree.alphabet import TERMINAL_BASE
+
+
 class AlphabetDict:
     ALPHA_SIZE = 128  # For 7-bit ASCII, for 8-bit increase to 256
-    NUMBER_OF_STRINGS = 0
 
-    def __init__(self):
-        self.entries = [None] * (AlphabetDict.ALPHA_SIZE + AlphabetDict.NUMBER_OF_STRINGS)
+    def __init__(self, size=ALPHA_SIZE):
+        # dense table over symbol ranks only, terminators (and unseen query ranks) live in the overflow map
+        self.entries = [None] * size
+        self.overflow = None
         self.size = 0
 
     def __setitem__(self, key, value):
-        if self.entries[AlphabetDict.rank(key)] is None:
+        rank = AlphabetDict.rank(key)
+        if rank >= TERMINAL_BASE:
+            if self.overflow is None:
+                self.overflow = SortedChildMap()
+            if rank not in self.overflow:
+                self.size += 1
+            self.overflow[rank] = value
+            return
+        if rank >= len(self.entries):
+            self.entries.extend([None] * (rank + 1 - len(self.entries)))
+        if self.entries[rank] is None:
             self.size += 1
-        self.entries[AlphabetDict.rank(key)] = value
+        self.entries[rank] = value
 
     def __getitem__(self, key):
-        return self.entries[AlphabetDict.rank(key)]
+        rank = AlphabetDict.rank(key)
+        if 0 <= rank < len(self.entries):
+            return self.entries[rank]
+        return None if self.overflow is None else self.overflow[rank]
 
     def __delitem__(self, key):
-        if self.entries[AlphabetDict.rank(key)] is not None:
-            self.size -= 1
-        self.entries[AlphabetDict.rank(key)] = None
+        rank = AlphabetDict.rank(key)
+        if self[rank] is None:
+            return
+        self.size -= 1
+        if 0 <= rank < len(self.entries):
+            self.entries[rank] = None
+        else:
+            del self.overflow[rank]
 
     def __contains__(self, key):
         return self[key] is not None
@@ -29,20 +53,158 @@ class AlphabetDict:
         return len(self) != 0
 
     def __iter__(self):
-        return filter(lambda x: x is not None, self.entries)
+        yield from self.alphabet_entries()
+        yield from self.non_alphabet_entries()
 
     def non_alphabet_entries(self):
-        return filter(lambda x: x is not None, self.entries[:AlphabetDict.ALPHA_SIZE+1])
+        return iter(()) if self.overflow is None else iter(self.overflow)
 
     def alphabet_entries(self):
-        return filter(lambda x: x is not None, self.entries[AlphabetDict.ALPHA_SIZE:])
+        return filter(lambda x: x is not None, self.entries)
 
     def pop(self, key):
         ret = self[key]
         del self[key]
         return ret
 
+    def is_full(self):
+        return False
+
+    def is_sparse(self):
+        return self.size < len(self.entries) // 16
+
+    def grow(self):
+        return self
+
+    def shrink(self):
+        occupied = [rank for rank, v in enumerate(self.entries) if v is not None]
+        keys, values = occupied, [self.entries[rank] for rank in occupied]
+        if self.overflow is not None:
+            keys, values = keys + self.overflow.keys, values + self.overflow.values
+        return SortedChildMap.from_items(keys, values)
+
     @staticmethod
     def rank(char):
         return char
         # return ord(char)
+
+
+class InlineChildMap:
+    # Tiny fan-out: keys kept in rank order and found by linear scan
+    CAPACITY = 4
+
+    __slots__ = ("keys", "values")
+
+    def __init__(self):
+        self.keys = []
+        self.values = []
+
+    def _index(self, key):
+        rank = AlphabetDict.rank(key)
+        for i, k in enumerate(self.keys):
+            if k == rank:
+                return i
+        return -1
+
+    def __setitem__(self, key, value):
+        i = self._index(key)
+        if i != -1:
+            self.values[i] = value
+            return
+        rank = AlphabetDict.rank(key)
+        i = 0
+        while i < len(self.keys) and self.keys[i] < rank:
+            i += 1
+        self.keys.insert(i, rank)
+        self.values.insert(i, value)
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        return None if i == -1 else self.values[i]
+
+    def __delitem__(self, key):
+        i = self._index(key)
+        if i != -1:
+            del self.keys[i]
+            del self.values[i]
+
+    def __contains__(self, key):
+        return self._index(key) != -1
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __bool__(self):
+        return len(self) != 0
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def pop(self, key):
+        ret = self[key]
+        del self[key]
+        return ret
+
+    def is_full(self):
+        return len(self) >= self.CAPACITY
+
+    def is_sparse(self):
+        return False
+
+    def grow(self):
+        return SortedChildMap.from_items(self.keys, self.values)
+
+    def shrink(self):
+        return self
+
+
+class SortedChildMap(InlineChildMap):
+    # Medium fan-out: keys kept in rank order and found by binary search
+
+    __slots__ = ()
+
+    @staticmethod
+    def from_items(keys, values):
+        child_map = SortedChildMap()
+        child_map.keys = list(keys)
+        child_map.values = list(values)
+        return child_map
+
+    def _index(self, key):
+        rank = AlphabetDict.rank(key)
+        i = bisect_left(self.keys, rank)
+        return i if i < len(self.keys) and self.keys[i] == rank else -1
+
+    def __setitem__(self, key, value):
+        rank = AlphabetDict.rank(key)
+        i = bisect_left(self.keys, rank)
+        if i < len(self.keys) and self.keys[i] == rank:
+            self.values[i] = value
+        else:
+            self.keys.insert(i, rank)
+            self.values.insert(i, value)
+
+    def _dense_size(self):
+        # number of symbol (non-terminator) keys and the table size needed to hold them
+        symbols = bisect_left(self.keys, TERMINAL_BASE)
+        return symbols, 0 if symbols == 0 else self.keys[symbols - 1] + 1
+
+    def is_full(self):
+        # a dense table only pays off once it is at least a quarter occupied
+        symbols, dense_size = self._dense_size()
+        return symbols >= max(InlineChildMap.CAPACITY, dense_size // 4)
+
+    def is_sparse(self):
+        return len(self) < InlineChildMap.CAPACITY // 2
+
+    def grow(self):
+        dense = AlphabetDict(self._dense_size()[1])
+        for key, value in zip(self.keys, self.values):
+            dense[key] = value
+        return dense
+
+    def shrink(self):
+        child_map = InlineChildMap()
+        child_map.keys = self.keys
+        child_map.values = self.values
+        return child_map
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from itertools import islice
+from typing import Iterator
+
+from UkkonensSuffixTree.alphabet import Alphabet, CodePointAlphabet
+
+NO_VERTEX = -1
+INDEX_FANOUT = 8  # sibling lists longer than this also get a first-char index
+
+
+class FlatTreeStorage:
+    """
+    Array-backed vertex storage: every vertex is an integer id indexing a set of parallel columns.
+    Leaves store `NO_VERTEX` as their edge end and resolve it through `string_end`, which plays the role of the
+    shared global end `Pointer` of the object-graph trees (one per input string).
+    Children are kept as singly linked sibling lists (`first_child`/`next_sibling`) ordered by first char, so the
+    terminator leaves sort last; only vertices with more than `INDEX_FANOUT` children also get a first-char dict.
+    """
+
+    ROOT = 0
+    COLUMNS = (("edge_start", 'q'), ("edge_end", 'q'), ("string_number", 'i'), ("suffix_link", 'i'),
+               ("suffix_start", 'q'), ("first_child", 'i'), ("next_sibling", 'i'))
+
+    def __init__(self) -> None:
+        self.txt_total: list[array] = []
+        self.string_end: array = array('q')
+
+        self.edge_start: array = array('q', [0])
+        self.edge_end: array = array('q', [NO_VERTEX])
+        self.string_number: array = array('i', [0])
+        self.suffix_link: array = array('i', [FlatTreeStorage.ROOT])
+        self.suffix_start: array = array('q', [NO_VERTEX])  # only set (>= 0) on leaves
+        self.first_child: array = array('i', [NO_VERTEX])
+        self.next_sibling: array = array('i', [NO_VERTEX])
+        self.child_index: dict[int, dict[int, int]] = {}
+        self.child_tail: dict[int, int] = {}  # last sibling of each indexed vertex
+
+    @staticmethod
+    def from_columns(txt_total, string_end, columns: dict) -> FlatTreeStorage:
+        # any indexable buffers will do, e.g. memoryviews over a mapped file (see `serialization.load`)
+        store = FlatTreeStorage.__new__(FlatTreeStorage)
+        store.txt_total = txt_total
+        store.string_end = string_end
+        for name, _ in FlatTreeStorage.COLUMNS:
+            setattr(store, name, columns[name])
+        store.child_index, store.child_tail = {}, {}  # rebuilt lazily by `get_child`
+        return store
+
+    def __len__(self) -> int:
+        return len(self.edge_start)
+
+    def new_vertex(self, string_number: int, start_idx: int, end_idx: int, suffix_start_index: int = NO_VERTEX) -> int:
+        self.edge_start.append(start_idx)
+        self.edge_end.append(end_idx)
+        self.string_number.append(string_number)
+        self.suffix_link.append(NO_VERTEX)
+        self.suffix_start.append(suffix_start_index)
+        self.first_child.append(NO_VERTEX)
+        self.next_sibling.append(NO_VERTEX)
+        return len(self.edge_start) - 1
+
+    def is_leaf(self, v: int) -> bool:
+        return self.suffix_start[v] >= 0
+
+    def parent_edge_end_index(self, v: int) -> int:
+        if self.suffix_start[v] >= 0:
+            return self.string_end[self.string_number[v]]
+        return self.edge_end[v]
+
+    def length(self, v: int) -> int:
+        if v == FlatTreeStorage.ROOT: return 0
+        return self.parent_edge_end_index(v) - self.edge_start[v] + 1
+
+    def first_char(self, v: int) -> int:
+        return self.txt_total[self.string_number[v]][self.edge_start[v]]
+
+    def get_child(self, v: int, child_first_char: int) -> int:
+        index = self.child_index.get(v)
+        if index is not None: return index.get(child_first_char, NO_VERTEX)
+        # siblings are ordered by first char, terminators last, so the scan stops at the first larger char
+        child, scanned = self.first_child[v], 0
+        while child != NO_VERTEX:
+            first_char = self.txt_total[self.string_number[child]][self.edge_start[child]]
+            if first_char >= child_first_char:
+                return child if first_char == child_first_char else NO_VERTEX
+            child = self.next_sibling[child]
+            scanned += 1
+            if scanned == INDEX_FANOUT:  # a long list not indexed yet, e.g. in a loaded tree
+                return self._index_children(v).get(child_first_char, NO_VERTEX)
+        return NO_VERTEX
+
+    def children(self, v: int):
+        child = self.first_child[v]
+        while child != NO_VERTEX:
+            yield child
+            child = self.next_sibling[child]
+
+    def _index_children(self, v: int) -> dict[int, int]:
+        index = {}
+        for child in self.children(v):
+            index[self.first_char(child)] = child
+            self.child_tail[v] = child
+        self.child_index[v] = index
+        return index
+
+    def add_child(self, v: int, child: int) -> None:
+        first_char = self.first_char(child)
+        index = self.child_index.get(v)
+        if index is not None:
+            index[first_char] = child
+            tail = self.child_tail[v]
+            if first_char > self.first_char(tail):
+                # terminators arrive in string order, so they are always appended here without a walk
+                self.next_sibling[tail] = child
+                self.child_tail[v] = child
+                return
+
+        prev, following, fanout = NO_VERTEX, self.first_child[v], 1
+        while following != NO_VERTEX and self.first_char(following) < first_char:
+            prev, following, fanout = following, self.next_sibling[following], fanout + 1
+        self.next_sibling[child] = following
+        if prev == NO_VERTEX:
+            self.first_child[v] = child
+        else:
+            self.next_sibling[prev] = child
+        if index is not None: return
+
+        while following != NO_VERTEX:  # unindexed lists are short, so counting the rest is cheap
+            following, fanout = self.next_sibling[following], fanout + 1
+        if fanout > INDEX_FANOUT:
+            self._index_children(v)
+
+    def replace_child(self, v: int, old_child: int, new_child: int) -> None:
+        # `new_child` starts with the same char, so it takes the place of `old_child` in the order and the index
+        index = self.child_index.get(v)
+        if index is not None:
+            index[self.first_char(new_child)] = new_child
+            if self.child_tail[v] == old_child:
+                self.child_tail[v] = new_child
+        self.next_sibling[new_child] = self.next_sibling[old_child]
+        self.next_sibling[old_child] = NO_VERTEX
+        if self.first_child[v] == old_child:
+            self.first_child[v] = new_child
+            return
+        prev = self.first_child[v]
+        while self.next_sibling[prev] != old_child:
+            prev = self.next_sibling[prev]
+        self.next_sibling[prev] = new_child
+
+    def nbytes(self) -> int:
+        columns = (self.string_end, *(getattr(self, name) for name, _ in FlatTreeStorage.COLUMNS), *self.txt_total)
+        return (sum(col.itemsize * len(col) for col in columns)
+                + sum(sys.getsizeof(index) for index in self.child_index.values()) + sys.getsizeof(self.child_tail))
+
+
+class _FlatUkkonen:
+    """Shared Ukkonen construction and search over `FlatTreeStorage`, mirroring the object-graph builders"""
+
+    def __init__(self, alphabet: Alphabet | None = None) -> None:
+        self.alphabet: Alphabet = CodePointAlphabet() if alphabet is None else alphabet
+        self.store: FlatTreeStorage = FlatTreeStorage()
+
+    @classmethod
+    def from_storage(cls, store: FlatTreeStorage, alphabet: Alphabet | None = None) -> _FlatUkkonen:
+        tree = cls(alphabet)
+        tree.store = store
+        return tree
+
+    @property
+    def txt_total(self) -> list[array]:
+        return self.store.txt_total
+
+    def _do_ukkonen(self, txt_lst: array, string_number: int) -> None:
+        store = self.store
+        store.txt_total.append(txt_lst)
+        store.string_end.append(-1)
+        string_end = store.string_end
+        edge_start = store.edge_start
+        suffix_link = store.suffix_link
+        get_child, length = store.get_child, store.length
+
+        active_vertex, start_index, end_index = FlatTreeStorage.ROOT, 0, 0
+        pending_vertex = NO_VERTEX
+        last_j = -1
+
+        for phase in range(len(txt_lst)):
+            string_end[string_number] = phase  # leaf extension
+            j = last_j + 1
+            while j <= phase:
+                # skip-count down to the extension point
+                while start_index != end_index:
+                    child = get_child(active_vertex, txt_lst[start_index])
+                    if child == NO_VERTEX or length(child) > end_index - start_index:
+                        break
+                    active_vertex = child
+                    start_index += length(child)
+
+                if start_index == end_index:
+                    if get_child(active_vertex, txt_lst[phase]) == NO_VERTEX:
+                        # rule 2 - no edge split
+                        store.add_child(active_vertex, store.new_vertex(string_number, phase, NO_VERTEX, j))
+                        if pending_vertex != NO_VERTEX: suffix_link[pending_vertex] = active_vertex
+                        pending_vertex = NO_VERTEX
+                        rule = 2
+                    else:
+                        rule = 3
+                else:
+                    vertex_below = get_child(active_vertex, txt_lst[start_index])
+                    comparison_point = edge_start[vertex_below] + end_index - start_index
+                    if txt_lst[phase] == store.txt_total[store.string_number[vertex_below]][comparison_point]:
+                        rule = 3
+                    else:
+                        # rule 2 - edge split
+                        new_vertex = store.new_vertex(store.string_number[vertex_below], edge_start[vertex_below],
+                                                      comparison_point - 1)
+                        store.replace_child(active_vertex, vertex_below, new_vertex)
+                        edge_start[vertex_below] = comparison_point
+                        store.add_child(new_vertex, vertex_below)
+                        store.add_child(new_vertex, store.new_vertex(string_number, phase, NO_VERTEX, j))
+                        if pending_vertex != NO_VERTEX: suffix_link[pending_vertex] = new_vertex
+                        pending_vertex = new_vertex
+                        rule = 2
+
+                if rule == 3:
+                    if pending_vertex != NO_VERTEX: suffix_link[pending_vertex] = active_vertex
+                    pending_vertex = NO_VERTEX
+                    end_index += 1
+                    break  # stop prematurely
+
+                last_j += 1
+                j = last_j + 1
+                # move to next extension i.e. traversing suffix links
+                if active_vertex == FlatTreeStorage.ROOT:
+                    if start_index != end_index:
+                        start_index += 1
+                    else:
+                        start_index += 1
+                        end_index += 1
+                active_vertex = suffix_link[active_vertex]
+
+    def _search_for_final_matching_vertex(self, search_string: str) -> int:
+        return self._search_for_final_matching_ranks(self.alphabet.encode_query(search_string))
+
+    def _search_for_final_matching_ranks(self, search_string_lst: list[int]) -> int:
+        store = self.store
+        current_vertex = FlatTreeStorage.ROOT
+        search_string_idx = 0
+        while search_string_idx < len(search_string_lst):
+            current_vertex = store.get_child(current_vertex, search_string_lst[search_string_idx])
+            if current_vertex == NO_VERTEX:
+                return NO_VERTEX
+            txt = store.txt_total[store.string_number[current_vertex]]
+            txt_idx = store.edge_start[current_vertex]
+            edge_end = store.parent_edge_end_index(current_vertex)
+            while txt_idx <= edge_end and search_string_idx < len(search_string_lst):
+                if txt[txt_idx] != search_string_lst[search_string_idx]:
+                    return NO_VERTEX
+                txt_idx += 1
+                search_string_idx += 1
+        return current_vertex
+
+    def _iter_leaves(self, vertex: int) -> Iterator[int]:
+        # the stack holds the current child at each depth, so memory is proportional to depth
+        store = self.store
+        if store.is_leaf(vertex):
+            yield vertex
+            return
+        stack = [store.first_child[vertex]]
+        while stack:
+            v = stack[-1]
+            if v == NO_VERTEX:
+                stack.pop()
+                if stack:
+                    stack[-1] = store.next_sibling[stack[-1]]
+            elif store.is_leaf(v):
+                yield v
+                stack[-1] = store.next_sibling[v]
+            else:
+                stack.append(store.first_child[v])
+
+
+class FlatSuffixTree(_FlatUkkonen):
+    """
+    `SuffixTree` built into `FlatTreeStorage` columns instead of `Vertex` objects
+    Accepts single strings, with the terminal character being `Alphabet.terminal()`
+    """
+
+    def add_to_suffix_tree(self, txt: str) -> None:
+        self.store = FlatTreeStorage()
+        txt_lst = array('I', self.alphabet.encode(txt))
+        txt_lst.append(self.alphabet.terminal())  # adding terminal character
+        self._do_ukkonen(txt_lst, 0)
+
+    def search_for_suffix_match(self, search_string: str):
+        vertex = self._search_for_final_matching_ranks(
+            self.alphabet.encode_query(search_string) + [self.alphabet.terminal()])
+        return None if vertex == NO_VERTEX else self.store.edge_start[vertex]
+
+    def iter_matches(self, search_string, limit: int | None = None) -> Iterator[int]:
+        """Lazily yield exact substring matches, stopping after `limit` of them"""
+        vertex = self._search_for_final_matching_vertex(search_string)
+        if vertex == NO_VERTEX: return
+        for leaf in islice(self._iter_leaves(vertex), limit):
+            yield self.store.suffix_start[leaf]
+
+    def search_for_match(self, search_string) -> list[int]:
+        """Search for exact substring matches (not suffix matches)"""
+        return list(self.iter_matches(search_string))
+
+
+class FlatGeneralisedSuffixTree(_FlatUkkonen):
+    """
+    `GeneralisedSuffixTree` built into `FlatTreeStorage` columns instead of `Vertex` objects
+    Terminal characters for each string are stored as `Alphabet.terminal(string_number)`, as children are
+    kept in sibling lists rather than fixed-size tables the number of strings does not need to be known up front.
+    """
+
+    def add_to_suffix_tree(self, txt: str, string_number: int | None = None) -> int:
+        """Append `txt` as the next string and return its string number"""
+        if string_number is None:
+            string_number = len(self.store.txt_total)
+        assert string_number == len(self.store.txt_total), "strings must be added in order of string number"
+        txt_lst = array('I', self.alphabet.encode(txt))
+        txt_lst.append(self.alphabet.terminal(string_number))
+        self._do_ukkonen(txt_lst, string_number)
+        return string_number
+
+    def iter_matches(self, search_string, limit: int | None = None) -> Iterator[tuple[int, int]]:
+        """Lazily yield exact substring matches, stopping after `limit` of them"""
+        vertex = self._search_for_final_matching_vertex(search_string)
+        if vertex == NO_VERTEX: return
+        store = self.store
+        for leaf in islice(self._iter_leaves(vertex), limit):
+            yield store.string_number[leaf], store.suffix_start[leaf]
+
+    def search_for_match(self, search_string) -> list[tuple[int, int]]:
+        """Search for exact substring matches (not suffix matches)"""
+        return list(self.iter_matches(search_string))
+
+
+if __name__ == "__main__":
+    s1 = FlatSuffixTree()
+    s1.add_to_suffix_tree("abacabad")
+    print(s1.search_for_match("aba"))
+
+    s2 = FlatGeneralisedSuffixTree()
+    s2.add_to_suffix_tree("abcabcbbbbbacabcab", 0)
+    s2.add_to_suffix_tree("abastabc", 1)
+    print(s2.search_for_match("abc"))
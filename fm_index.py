@@ -0,0 +1,219 @@
+"""
+Compressed full-text index: an FM-index over the Burrows-Wheeler transform of one terminated text
+
+Only the BWT (one byte per character for up to 256 distinct symbols), occurrence counts checkpointed every
+`occ_rate` rows, and the suffix array sampled at every `sample_rate`-th text position are kept. `count` is a backward
+search in pattern-length time; `search_for_match` additionally walks each match back to a sampled position, at most
+`sample_rate - 1` LF steps, so the sampling rate trades memory against locate latency.
+Built from text alone, the suffix array is induced-sorted (SA-IS) in linear time over flat integer arrays.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Sequence
+
+from UkkonensSuffixTree.alphabet import Alphabet, CodePointAlphabet
+
+
+def _bucket_bounds(s: Sequence[int], k: int, tails: bool) -> array:
+    bounds = array('q', [0]) * k
+    for c in s:
+        bounds[c] += 1
+    total = 0
+    for c in range(k):
+        total += bounds[c]
+        bounds[c] = total if tails else total - bounds[c]
+    return bounds
+
+
+def _induce(s: Sequence[int], k: int, s_type: bytearray, sa: array) -> None:
+    # L-type suffixes left to right from the heads of their buckets, then S-type right to left from the tails
+    heads = _bucket_bounds(s, k, False)
+    for i in range(len(sa)):
+        j = sa[i] - 1
+        if j >= 0 and not s_type[j]:
+            sa[heads[s[j]]] = j
+            heads[s[j]] += 1
+    tails = _bucket_bounds(s, k, True)
+    for i in range(len(sa) - 1, -1, -1):
+        j = sa[i] - 1
+        if j >= 0 and s_type[j]:
+            tails[s[j]] -= 1
+            sa[tails[s[j]]] = j
+
+
+def _sais(s: Sequence[int], k: int) -> array:
+    """Suffix array by induced sorting (SA-IS) of `s`, whose codes are below `k` and which ends in a unique 0"""
+    n = len(s)
+    s_type = bytearray(n)
+    s_type[-1] = 1
+    for i in range(n - 2, -1, -1):
+        s_type[i] = s[i] < s[i + 1] or (s[i] == s[i + 1] and s_type[i + 1])
+    lms = array('i', (i for i in range(1, n) if s_type[i] and not s_type[i - 1]))
+
+    # sort the LMS substrings: seed them at their bucket tails and induce
+    sa = array('i', [-1]) * n
+    tails = _bucket_bounds(s, k, True)
+    for i in lms:
+        tails[s[i]] -= 1
+        sa[tails[s[i]]] = i
+    _induce(s, k, s_type, sa)
+
+    # name each LMS substring by its rank, equal substrings sharing a name
+    names = array('i', [-1]) * n
+    name, previous = 0, -1
+    for i in sa:
+        if i <= 0 or not s_type[i] or s_type[i - 1]: continue
+        if previous >= 0:
+            d = 0
+            while True:
+                # types agree up to here, so both substrings end together at the next LMS position
+                if s[i + d] != s[previous + d] or s_type[i + d] != s_type[previous + d]:
+                    name += 1
+                    break
+                if d and s_type[i + d] and not s_type[i + d - 1]: break
+                d += 1
+        names[i] = name
+        previous = i
+
+    # order the LMS suffixes, recursing on the string of names if two LMS substrings are equal
+    reduced = array('i', (names[i] for i in lms))
+    del names
+    if name + 1 < len(reduced):
+        lms_order = _sais(reduced, name + 1)
+    else:
+        lms_order = array('i', [0]) * len(reduced)
+        for position, rank in enumerate(reduced):
+            lms_order[rank] = position
+    del reduced
+
+    for i in range(n):
+        sa[i] = -1
+    tails = _bucket_bounds(s, k, True)
+    for position in reversed(lms_order):
+        i = lms[position]
+        tails[s[i]] -= 1
+        sa[tails[s[i]]] = i
+    _induce(s, k, s_type, sa)
+    return sa
+
+
+def _suffix_array(codes: Sequence[int]) -> array:
+    # SA-IS wants a smallest sentinel; the terminator is the unique largest last code, so every comparison is decided
+    # by it at the latest, and the suffix order of `codes` is that of the codes shifted up with a 0 appended
+    shifted = array('I', [0]) * (len(codes) + 1)
+    for i, code in enumerate(codes):
+        shifted[i] = code + 1
+    return _sais(shifted, max(codes) + 2)[1:]
+
+
+class BitVector:
+    """Bits packed 64 to a word with a cumulative popcount per word, for constant time `rank1`"""
+
+    def __init__(self, bits: Sequence[bool]) -> None:
+        self.words = array('Q', [0]) * (len(bits) // 64 + 1)
+        for i, bit in enumerate(bits):
+            if bit: self.words[i >> 6] |= 1 << (i & 63)
+        self.word_ranks = array('q', [0]) * len(self.words)
+        for w in range(1, len(self.words)):
+            self.word_ranks[w] = self.word_ranks[w - 1] + self.words[w - 1].bit_count()
+
+    def __getitem__(self, i: int) -> bool:
+        return bool(self.words[i >> 6] >> (i & 63) & 1)
+
+    def rank1(self, i: int) -> int:
+        """Set bits before position `i`"""
+        return self.word_ranks[i >> 6] + (self.words[i >> 6] & ((1 << (i & 63)) - 1)).bit_count()
+
+    def nbytes(self) -> int:
+        return self.words.itemsize * len(self.words) + self.word_ranks.itemsize * len(self.word_ranks)
+
+
+class FMIndex:
+    """
+    FM-index built from the same input `SuffixTree` accepts, answering its `count` and `search_for_match`
+    Symbols are remapped to dense codes in rank order with the terminator last, matching the tree's suffix order.
+    """
+
+    def __init__(self, txt, alphabet: Alphabet | None = None, sample_rate: int = 32, occ_rate: int = 256,
+                 suffix_starts: Sequence[int] | None = None) -> None:
+        self.alphabet: Alphabet = CodePointAlphabet() if alphabet is None else alphabet
+        self.sample_rate: int = sample_rate
+        self.occ_rate: int = occ_rate
+        ranks = self.alphabet.encode(txt)
+        self.codes: dict[int, int] = {rank: code for code, rank in enumerate(sorted(set(ranks)))}
+        terminator = len(self.codes)
+        codes = array('I', [self.codes[rank] for rank in ranks])
+        del ranks
+        codes.append(terminator)
+        if suffix_starts is None:
+            suffix_starts = _suffix_array(codes)
+        n = len(codes)
+
+        self.bwt = (bytes if terminator < 256 else lambda c: array('I', c))(codes[i - 1] for i in suffix_starts)
+        del codes
+        self.terminator: int = terminator
+
+        # C[c] is the number of characters smaller than c, occ[c][k] the occurrences of c in bwt[:k * occ_rate]
+        counts = [0] * (terminator + 1)
+        self.occ: list[array] = [array('I', [0]) * (n // occ_rate + 1) for _ in counts]
+        for i, code in enumerate(self.bwt):
+            if i % occ_rate == 0:
+                for c, count in enumerate(counts):
+                    self.occ[c][i // occ_rate] = count
+            counts[code] += 1
+        if n % occ_rate == 0:
+            for c, count in enumerate(counts):
+                self.occ[c][n // occ_rate] = count
+        self.C = array('q', [0]) * (terminator + 2)
+        for c, count in enumerate(counts):
+            self.C[c + 1] = self.C[c] + count
+
+        self.sampled = BitVector(bytes(start % sample_rate == 0 for start in suffix_starts))
+        self.samples = array('q', (start for start in suffix_starts if start % sample_rate == 0))
+
+    @classmethod
+    def from_suffix_tree(cls, tree, sample_rate: int = 32, occ_rate: int = 256) -> FMIndex:
+        """Reuse the suffix order of a built `SuffixTree` instead of sorting the suffixes again"""
+        assert tree.terminated, "call finish() before building an index from a streamed tree"
+        suffix_starts, _ = tree.suffix_array()
+        txt = tree.alphabet.decode(tree.txt_total[:-1])
+        return cls(txt, tree.alphabet, sample_rate, occ_rate, suffix_starts)
+
+    def __len__(self) -> int:
+        return len(self.bwt)
+
+    def nbytes(self) -> int:
+        columns = (self.C, self.samples, *self.occ)
+        return (len(self.bwt) * (1 if isinstance(self.bwt, bytes) else self.bwt.itemsize) + self.sampled.nbytes()
+                + sum(col.itemsize * len(col) for col in columns))
+
+    def _rank(self, code: int, i: int) -> int:
+        """Occurrences of `code` in bwt[:i]"""
+        checkpoint = i // self.occ_rate
+        return self.occ[code][checkpoint] + self.bwt[checkpoint * self.occ_rate:i].count(code)
+
+    def _range(self, search_string) -> range:
+        lo, hi = 0, len(self.bwt)
+        for rank in reversed(self.alphabet.encode_query(search_string)):
+            code = self.codes.get(rank)
+            if code is None: return range(0)
+            lo, hi = self.C[code] + self._rank(code, lo), self.C[code] + self._rank(code, hi)
+            if lo >= hi: return range(0)
+        return range(lo, hi)
+
+    def _locate(self, row: int) -> int:
+        # LF-map back to a sampled row; offset 0 is always sampled, so the walk never wraps past the text start
+        steps = 0
+        while not self.sampled[row]:
+            code = self.bwt[row]
+            row = self.C[code] + self._rank(code, row)
+            steps += 1
+        return self.samples[self.sampled.rank1(row)] + steps
+
+    def count(self, search_string) -> int:
+        return len(self._range(search_string))
+
+    def search_for_match(self, search_string) -> list[int]:
+        """Search for exact substring matches (not suffix matches)"""
+        return [self._locate(row) for row in self._range(search_string)]
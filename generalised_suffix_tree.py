@@ -1,46 +1,298 @@
+import time
+from array import array
+from itertools import islice
+from typing import Iterator
+
 from UkkonensSuffixTree.active_information import ActiveInformation
-from UkkonensSuffixTree.dict import AlphabetDict
+from UkkonensSuffixTree.alphabet import Alphabet, CodePointAlphabet
+from UkkonensSuffixTree.approximate import iter_edit_loci, iter_mismatch_loci
+from UkkonensSuffixTree.cache import QueryCache
+from UkkonensSuffixTree.matching import longest_prefix_length, matching_statistics
 from UkkonensSuffixTree.pointer_int import Pointer
+from UkkonensSuffixTree.stats import TreeStats, peak_rss_bytes
+from UkkonensSuffixTree.suffix_array import SuffixArrayIndex, suffix_and_lcp_arrays
 from UkkonensSuffixTree.vertex import Vertex
 
 
 class GeneralisedSuffixTree:
     """
     Ukkonen's linear-time implicit suffix tree construction of multiple input strings
-    Terminal characters for each string get stored as integers > `AlphaDict.NUMBER_OF_STRINGS` hence why the tree is
-    initially constructed by inputting the number of strings, which is a fixed for the duration of the program.
+    Input symbols are ranked by `alphabet` and terminal characters for each string are stored as
+    `Alphabet.terminal(string_number)`, outside the dense child tables, so strings can keep being appended and
+    several trees can coexist in one process. `number_of_strings` optionally caps how many strings may be added.
     """
 
-    def __init__(self, number_of_strings: int = 1) -> None:
-        AlphabetDict.NUMBER_OF_STRINGS = number_of_strings  # number of different strings to be placed into the generalised suffix tree
-        self.txt_total: list[tuple[int, ...]] = []
+    def __init__(self, number_of_strings: int | None = None, alphabet: Alphabet | None = None,
+                 fast_build: bool = True) -> None:
+        self.fast_build: bool = fast_build
+        self.number_of_strings: int | None = number_of_strings
+        self.alphabet: Alphabet = CodePointAlphabet() if alphabet is None else alphabet
+        self.txt_total: list[array] = []
         self.end: Pointer | None = None
         self.ROOT: Vertex = Vertex.create_root()
+        self.annotated: bool = False
+        self.removed_strings: set[int] = set()
+        self.version: int = 0  # bumped by every mutation, invalidating cached query results
+        self.cache: QueryCache | None = None
+        self.stats: TreeStats | None = None
+
+        # Ukkonen state of the string currently being extended, kept between `extend` calls
+        self._open_string_number: int | None = None
+        self._active_info: ActiveInformation | None = None
+        self._pending_vertex: Vertex | None = None
+        self._last_j: int = -1
+
+    def add_to_suffix_tree(self, txt: str, string_number: int | None = None) -> int:
+        """Append `txt` as the next string and return its string number"""
+        self._open_string(string_number)
+        self.extend(txt)
+        return self.finish()
+
+    def extend(self, chunk) -> None:
+        """Append the next chunk of the string being built (opening a new string if none is), running its phases"""
+        if self._open_string_number is None:
+            self._open_string(None)
+        self.version += 1
+        txt_lst = self.txt_total[self._open_string_number]
+        first_phase = len(txt_lst)
+        txt_lst.extend(self.alphabet.encode(chunk))
+        self._do_ukkonen(self._open_string_number, first_phase)
+
+    def finish(self) -> int:
+        """Terminate the string being built and return its string number"""
+        if self._open_string_number is None:
+            self._open_string(None)
+        string_number = self._open_string_number
+        self.version += 1
+        txt_lst = self.txt_total[string_number]
+        txt_lst.append(self.alphabet.terminal(string_number))
+        self._do_ukkonen(string_number, len(txt_lst) - 1)
+        self._open_string_number = None
+        return string_number
+
+    def build_from_stream(self, fileobj, chunk_size: int = 1 << 16, string_number: int | None = None) -> int:
+        """Add everything `fileobj.read` returns as one string, holding only one chunk of decoded input at a time"""
+        self._open_string(string_number)
+        while chunk := fileobj.read(chunk_size):
+            self.extend(chunk)
+        return self.finish()
 
-    def add_to_suffix_tree(self, txt: str, string_number: int = 0) -> None:
-        self._do_ukkonen(txt, string_number)
+    def remove_document(self, string_number: int) -> None:
+        """
+        Remove every suffix of a string without rebuilding: its leaves are detached, internal vertices left with a
+        single child are merged into that child, and surviving edges labelled with the removed text are relabelled
+        onto a remaining string. Suffix links need no repair, a branching vertex xA implies A is still branching.
+        String numbers of the remaining strings are unchanged, the removed text is released by `compact`.
+        """
+        assert self._open_string_number is None, "cannot remove while a string is being built"
+        assert 0 <= string_number < len(self.txt_total) and string_number not in self.removed_strings
+        txt_total = self.txt_total
+        txt = txt_total[string_number]
 
-    def _do_ukkonen(self, txt: str, string_number) -> None:
-        assert 0 <= string_number < AlphabetDict.NUMBER_OF_STRINGS
-        txt_lst = tuple(list(map(ord, [*txt])) + [AlphabetDict.ALPHA_SIZE + string_number])
-        self.txt_total.append(txt_lst)
+        # find the leaf of every suffix as the builder does: resume from the suffix link of a vertex above the previous
+        # leaf and skip-count down by edge lengths, so the walks take amortised linear time even on repetitive text.
+        # Only vertices reached from the root this way are recorded, so every recorded vertex has its parent recorded.
+        parents: dict[Vertex, Vertex] = {}
+        depths: dict[Vertex, int] = {self.ROOT: 0}  # string depth of the recorded internal vertices
+        labelled: dict[Vertex, int] = {}  # recorded vertices whose edge label is in the removed text
+        leaves = []
+        above = self.ROOT
+        for suffix_start in range(len(txt)):
+            while not above.is_root and above.suffix_link not in depths:
+                above = parents[above]
+            v = self.ROOT if above.is_root else above.suffix_link
+            depth = depths[v]
+            while v.children is not None:
+                child = v.children[txt[suffix_start + depth]]
+                parents[child] = v
+                v, depth = child, depth + child.length()
+                if v.children is not None:
+                    depths[v] = depth
+                    if v.string_number == string_number: labelled[v] = depth
+            leaves.append(v)
+            above = parents[v]
+
+        for leaf in leaves:
+            parent = parents[leaf]
+            parent.remove_child(txt[leaf.parent_edge_start_index])
+            if parent.is_root or len(parent.children) > 1: continue
+            # merge the now unary parent into its only child
+            child = next(iter(parent.children))
+            grandparent = parents[parent]
+            child.parent_edge_start_index -= parent.length()
+            grandparent.children[txt_total[parent.string_number][parent.parent_edge_start_index]] = child
+            parents[child] = grandparent
+            labelled.pop(parent, None)
+
+        # relabel onto any leaf below, remembered for every vertex passed so no subtree is descended twice
+        leaf_below: dict[Vertex, Vertex] = {}
+        for v, depth in labelled.items():
+            path = []
+            leaf = v
+            while leaf.children is not None and leaf not in leaf_below:
+                path.append(leaf)
+                leaf = next(iter(leaf.children))
+            leaf = leaf_below.get(leaf, leaf)
+            for u in path:
+                leaf_below[u] = leaf
+            edge_length = v.length()
+            v.string_number = leaf.string_number
+            v._parent_edge_end_index = leaf.suffix_start_index + depth - 1
+            v.parent_edge_start_index = v._parent_edge_end_index - edge_length + 1
+
+        self.removed_strings.add(string_number)
+        self.annotated = False
+        self.version += 1
+
+    def compact(self) -> None:
+        """Release the text of removed strings and shrink child maps left oversized by removals"""
+        for string_number in self.removed_strings:
+            self.txt_total[string_number] = array('I')
+        for v in self.ROOT.iter_post_order():
+            while v.children is not None and v.children.is_sparse():
+                v.children = v.children.shrink()
+
+    def _open_string(self, string_number: int | None) -> None:
+        assert self._open_string_number is None, "previous string has not been finished"
+        if string_number is None:
+            string_number = len(self.txt_total)
+        assert string_number == len(self.txt_total), "strings must be added in order of string number"
+        assert self.number_of_strings is None or string_number < self.number_of_strings
+        self.txt_total.append(array('I'))
         self.end = Pointer()
-        pending_vertex = None
-        last_j = - 1
-        active_info = ActiveInformation(self.ROOT)
+        self._open_string_number = string_number
+        self._active_info = ActiveInformation(self.ROOT)
+        self._pending_vertex = None
+        self._last_j = -1
+
+    def _do_ukkonen(self, string_number: int, txt_start_idx: int) -> None:
+        self.annotated = False
+        stats = self.stats
+        build_start = time.perf_counter()
+        if self.fast_build:
+            self._do_ukkonen_fast(string_number, txt_start_idx)
+        else:
+            self._do_ukkonen_reference(string_number, txt_start_idx)
+        if stats is not None:
+            stats.build_seconds += time.perf_counter() - build_start
+            stats.peak_rss_bytes = peak_rss_bytes()
 
-        for phase in range(len(txt_lst)):
+    def _do_ukkonen_reference(self, string_number: int, txt_start_idx: int) -> None:
+        stats = self.stats
+        active_info, pending_vertex, last_j = self._active_info, self._pending_vertex, self._last_j
+
+        for phase in range(txt_start_idx, len(self.txt_total[string_number])):
             self.end.increment()  # leaf extension
+            if stats is not None:
+                stats.phases += 1
+                stats.rule_1_extensions += last_j + 1
             j = last_j + 1
             while j <= phase:
                 active_info = self._traverse(active_info, string_number)
                 rule, active_info, pending_vertex = self._do_extension(active_info, pending_vertex, string_number, j,
                                                                        phase)
+                if stats is not None:
+                    stats.record_extension(rule, pending_vertex is not None, active_info.vertex.is_root)
                 if rule == 3: break  # stop prematurely
                 if rule == 2: last_j += 1
                 j = last_j + 1
                 active_info = GeneralisedSuffixTree._maybe_move_to_next_extension(active_info, rule)
 
+        self._active_info, self._pending_vertex, self._last_j = active_info, pending_vertex, last_j
+
+    def _do_ukkonen_fast(self, string_number: int, txt_start_idx: int) -> None:
+        # Same phases and extensions as the method-per-step builder above, with the active point held in locals,
+        # the global end updated once per phase and every child looked up once
+        txt_total = self.txt_total
+        txt = txt_total[string_number]
+        root, end = self.ROOT, self.end
+        active_info = self._active_info
+        active_vertex, start_index, end_index = active_info.vertex, active_info.start_index, active_info.end_index
+        pending_vertex, last_j = self._pending_vertex, self._last_j
+        first_j, rule_1, splits, rule_3, hops, walks = last_j, 0, 0, 0, 0, 0  # counters for `self.stats`
+
+        for phase in range(txt_start_idx, len(txt)):
+            end.v = phase  # leaf extension
+            char = txt[phase]
+            j = last_j + 1
+            rule_1 += j
+            while j <= phase:
+                # skip-count down to the extension point
+                vertex_below = None
+                while start_index != end_index:
+                    vertex_below = active_vertex.children[txt[start_index]]
+                    edge_end = vertex_below._parent_edge_end_index
+                    if vertex_below.children is None:
+                        edge_end = edge_end.v  # leaves of earlier strings keep their own end
+                    edge_length = edge_end - vertex_below.parent_edge_start_index + 1
+                    if edge_length > end_index - start_index:
+                        break
+                    active_vertex = vertex_below
+                    start_index += edge_length
+                    hops += 1
+                    vertex_below = None
+
+                if vertex_below is None:
+                    children = active_vertex.children
+                    if children is not None and children[char] is not None:
+                        # rule 3 - matching character at start of edge
+                        if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                        pending_vertex = None
+                        end_index += 1
+                        rule_3 += 1
+                        break
+                    # rule 2 - no edge split
+                    leaf = Vertex(string_number, phase, end)
+                    leaf.suffix_start_index = j
+                    active_vertex.add_child(leaf, char)
+                    if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                    pending_vertex = None
+                else:
+                    below_txt = txt_total[vertex_below.string_number]
+                    below_start = vertex_below.parent_edge_start_index
+                    mismatch_edge_idx = below_start + end_index - start_index
+                    if below_txt[mismatch_edge_idx] == char:
+                        # rule 3 - matching character on existing edge
+                        if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                        pending_vertex = None
+                        end_index += 1
+                        rule_3 += 1
+                        break
+                    # rule 2 - edge split
+                    new_vert = Vertex(vertex_below.string_number, below_start, mismatch_edge_idx - 1)
+                    active_vertex.children[below_txt[below_start]] = new_vert
+                    new_vert.add_child(vertex_below, below_txt[mismatch_edge_idx])
+                    vertex_below.parent_edge_start_index = mismatch_edge_idx
+                    leaf = Vertex(string_number, phase, end)
+                    leaf.suffix_start_index = j
+                    new_vert.add_child(leaf, char)
+                    if pending_vertex is not None: pending_vertex.suffix_link = new_vert
+                    pending_vertex = new_vert
+                    splits += 1
+
+                last_j += 1
+                j = last_j + 1
+                # move to next extension i.e. traversing suffix links
+                if active_vertex is root:
+                    if start_index == end_index:
+                        end_index += 1
+                    start_index += 1
+                else:
+                    walks += 1
+                active_vertex = active_vertex.suffix_link
+
+        active_info.vertex, active_info.start_index, active_info.end_index = active_vertex, start_index, end_index
+        self._pending_vertex, self._last_j = pending_vertex, last_j
+        stats = self.stats
+        if stats is not None:
+            stats.phases += len(txt) - txt_start_idx
+            stats.rule_1_extensions += rule_1
+            stats.rule_2_leaf_extensions += last_j - first_j - splits
+            stats.rule_2_splits += splits
+            stats.rule_3_extensions += rule_3
+            stats.skip_count_hops += hops
+            stats.suffix_link_walks += walks
+
     def _traverse(self, active_info: ActiveInformation, string_number: int) -> ActiveInformation:
         # Skip-count down to the extension point
 
@@ -50,6 +302,7 @@ class GeneralisedSuffixTree:
                 break
             active_info.vertex = temp_vertex
             active_info.increase_start_index(temp_vertex.length())
+            if self.stats is not None: self.stats.skip_count_hops += 1
 
         return active_info
 
@@ -138,10 +391,47 @@ class GeneralisedSuffixTree:
                                 self.txt_total[string_number][end_index])
         return active_vertex
 
+    def enable_cache(self, max_entries: int | None = 1024, max_bytes: int | None = None) -> QueryCache:
+        """Opt in to an LRU cache of query results, emptied whenever the tree is mutated"""
+        self.cache = QueryCache(max_entries, max_bytes)
+        return self.cache
+
+    def enable_stats(self) -> TreeStats:
+        """Opt in to build and query counters, see `UkkonensSuffixTree.stats`; builds from here on are counted"""
+        self.stats = TreeStats()
+        return self.stats
+
+    def _cached_query(self, kind: str, search_string, query):
+        if self.cache is None: return query(search_string)
+        self.cache.sync(self.version)
+        key = (kind, search_string if isinstance(search_string, (str, bytes)) else tuple(search_string))
+        result = self.cache.get(key)
+        if result is None:
+            result = query(search_string)
+            self.cache.put(key, result)
+        return list(result) if isinstance(result, list) else result
+
+    def _search_cached_locus(self, search_string_lst: list[int]) -> Vertex | None:
+        # resume from the locus of the longest already matched prefix, then remember this pattern's locus too
+        self.cache.sync(self.version)
+        ranks = tuple(search_string_lst)
+        length, locus = self.cache.longest_cached_prefix(ranks)
+        if locus is None:
+            locus = (self.ROOT, 0)
+        for char in ranks[length:]:
+            locus = self._step(locus, char)
+            if locus is None: return None
+        if length < len(ranks):
+            self.cache.put(("locus", ranks), locus)
+        return locus[0]
+
     def _search_for_final_matching_vertex(self, search_string: str) -> Vertex | None:
+        return self._search_for_final_matching_ranks(self.alphabet.encode_query(search_string))
+
+    def _search_for_final_matching_ranks(self, search_string_lst: list[int]) -> Vertex | None:
+        if self.cache is not None: return self._search_cached_locus(search_string_lst)
         current_vertex = self.ROOT
         search_string_idx = 0
-        search_string_lst = list(map(ord, [*search_string]))
         while search_string_idx < len(search_string_lst):
             current_vertex = current_vertex.get_child(search_string_lst[search_string_idx])
             if current_vertex is None:
@@ -154,27 +444,181 @@ class GeneralisedSuffixTree:
                 search_string_idx += 1
         return current_vertex
 
+    def iter_matches(self, search_string, limit: int | None = None) -> Iterator[tuple[int, int]]:
+        """Lazily yield exact substring matches, stopping after `limit` of them"""
+        vertex = self._search_for_final_matching_vertex(search_string)
+        if vertex is None: return
+        for leaf in islice(vertex.iter_leaves(), limit):
+            yield leaf.string_number, leaf.suffix_start_index
+
     def search_for_match(self, search_string) -> list[tuple[int, int]]:
         """Search for exact substring matches (not suffix matches)"""
+        if self.stats is not None: return self._search_for_match_timed(search_string)
+        return self._cached_query("match", search_string, lambda pattern: list(self.iter_matches(pattern)))
+
+    def _step(self, locus: tuple[Vertex, int], char: int) -> tuple[Vertex, int] | None:
+        # Advance a (vertex, next edge index) locus by one character, None on mismatch
+        vertex, txt_idx = locus
+        if vertex.is_root or txt_idx > vertex.parent_edge_end_index:
+            child = vertex.get_child(char)
+            return None if child is None else (child, child.parent_edge_start_index + 1)
+        if self.txt_total[vertex.string_number][txt_idx] != char:
+            return None
+        return vertex, txt_idx + 1
+
+    def search_for_matches(self, search_strings) -> list[list[tuple[int, int]]]:
+        """
+        Batch `search_for_match`: patterns are visited in sorted order and the loci along the previous pattern are
+        kept, so a prefix shared with it is walked once. Results are grouped per pattern, in input order.
+        With stats enabled every pattern is searched (and timed) on its own.
+        """
+        if self.stats is not None: return [self.search_for_match(search_string) for search_string in search_strings]
+        encoded = [self.alphabet.encode_query(search_string) for search_string in search_strings]
+        results: list[list[tuple[int, int]]] = [[] for _ in encoded]
+        path = [(self.ROOT, 0)]  # path[d] is the locus after matching d characters of the previous pattern
+        previous, previous_idx = None, None
+        for idx in sorted(range(len(encoded)), key=encoded.__getitem__):
+            pattern = encoded[idx]
+            if pattern == previous:
+                results[idx] = list(results[previous_idx])
+                continue
+            shared = 0
+            while shared < len(path) - 1 and shared < len(pattern) and pattern[shared] == previous[shared]:
+                shared += 1
+            del path[shared + 1:]
+            while len(path) <= len(pattern):
+                locus = self._step(path[-1], pattern[len(path) - 1])
+                if locus is None: break
+                path.append(locus)
+            if len(path) > len(pattern):
+                results[idx] = [(leaf.string_number, leaf.suffix_start_index) for leaf in path[-1][0].iter_leaves()]
+            previous, previous_idx = pattern, idx
+        return results
+
+    def _search_for_match_timed(self, search_string) -> list[tuple[int, int]]:
+        start = time.perf_counter()
+        locus, edges_visited = (self.ROOT, 0), 0
+        for char in self.alphabet.encode_query(search_string):
+            vertex, locus = locus[0], self._step(locus, char)
+            if locus is None: break
+            edges_visited += locus[0] is not vertex
+        matches = [] if locus is None else [(leaf.string_number, leaf.suffix_start_index)
+                                            for leaf in locus[0].iter_leaves()]
+        self.stats.record_query(time.perf_counter() - start, edges_visited, len(matches))
+        return matches
+
+    def is_substring(self, search_string) -> bool:
+        return self._search_for_final_matching_vertex(search_string) is not None
+
+    def longest_prefix_match(self, search_string) -> int:
+        """Length of the longest prefix of `search_string` occurring in the index, i.e. how far it matches"""
+        return longest_prefix_length(self.ROOT, lambda v: self.txt_total[v.string_number],
+                                     self.alphabet.encode_query(search_string))
+
+    def matching_statistics(self, txt) -> array:
+        """
+        For every offset i of `txt`, the length of the longest prefix of txt[i:] occurring in the index,
+        in time linear in `len(txt)` by following suffix links
+        """
+        return matching_statistics(self.ROOT, lambda v: self.txt_total[v.string_number],
+                                   self.alphabet.encode_query(txt))
+
+    def search_approximate(self, search_string, max_mismatches: int = 1) -> list[tuple[int, int, int]]:
+        """Substring matches with at most `max_mismatches` substitutions, as (string number, offset, distance)"""
+        loci = iter_mismatch_loci(self.ROOT, lambda v: self.txt_total[v.string_number],
+                                  self.alphabet.encode_query(search_string), max_mismatches)
+        return [(leaf.string_number, leaf.suffix_start_index, distance)
+                for locus, distance in loci for leaf in locus.iter_leaves()]
+
+    def search_edit_distance(self, search_string, max_edits: int = 1) -> list[tuple[int, int, int]]:
+        """
+        Offsets where a substring within edit distance `max_edits` of `search_string` starts, as
+        (string number, offset, distance) with the smallest distance over the substrings starting there
+        """
+        loci = iter_edit_loci(self.ROOT, lambda v: self.txt_total[v.string_number],
+                              self.alphabet.encode_query(search_string), max_edits)
+        return [(leaf.string_number, leaf.suffix_start_index, distance)
+                for locus, distance in loci for leaf in locus.iter_leaves()]
+
+    def annotate_counts(self) -> None:
+        """
+        Post-build pass storing, on every vertex, the number of leaves and of distinct strings below it,
+        so `count` and `document_frequency` run in pattern-length time
+        Child string sets are merged small-to-large and dropped once their parent is annotated.
+        """
+        string_sets = {}
+        for v in self.ROOT.iter_post_order():
+            if v.children is None:
+                v.leaf_count = 0 if v.is_root else 1
+                strings = set() if v.is_root else {v.string_number}
+            else:
+                v.leaf_count = sum(child.leaf_count for child in v.children)
+                strings = set()
+                for child in v.children:
+                    child_strings = string_sets.pop(child)
+                    if len(child_strings) > len(strings):
+                        strings, child_strings = child_strings, strings
+                    strings |= child_strings
+            v.document_count = len(strings)
+            string_sets[v] = strings
+        self.annotated = True
+
+    def count(self, search_string) -> int:
+        """Number of exact substring matches, without enumerating them once `annotate_counts` has run"""
+        return self._cached_query("count", search_string, self._count)
+
+    def _count(self, search_string) -> int:
         vertex = self._search_for_final_matching_vertex(search_string)
-        visited = []
-        if vertex is None: return visited
+        if vertex is None: return 0
+        if self.annotated: return vertex.leaf_count
+        return sum(1 for _ in vertex.iter_leaves())
 
-        def dfs(v):
-            visited.append(v)
+    def document_frequency(self, search_string) -> int:
+        """Number of distinct strings containing `search_string`"""
+        return self._cached_query("documents", search_string, self._document_frequency)
+
+    def _document_frequency(self, search_string) -> int:
+        vertex = self._search_for_final_matching_vertex(search_string)
+        if vertex is None: return 0
+        if self.annotated: return vertex.document_count
+        return len({leaf.string_number for leaf in vertex.iter_leaves()})
+
+    def longest_common_substring(self, k_of_n: int | None = None):
+        """
+        Longest substring shared by at least `k_of_n` of the strings (all of them by default), i.e. the path label of
+        the deepest internal vertex whose `document_count` is at least `k_of_n`
+        """
+        if k_of_n is None:
+            k_of_n = len(self.txt_total) - len(self.removed_strings)
+        if not self.annotated:
+            self.annotate_counts()
+        best_vertex, best_depth = None, 0
+        stack = [(self.ROOT, 0)]
+        while stack:
+            v, depth = stack.pop()
+            if v.document_count < k_of_n: continue
+            if v.children is None:
+                depth -= 1  # a leaf (only reachable when k_of_n <= 1) is a whole string, minus its terminator
+            if depth > best_depth:
+                best_vertex, best_depth = v, depth
             if v.children is not None:
-                for child in v.children:
-                    dfs(child)
+                stack.extend((child, depth + child.length()) for child in v.children)
+        if best_vertex is None: return self.alphabet.decode([])
+        end_index = best_vertex.parent_edge_end_index - (1 if best_vertex.is_leaf() else 0)
+        txt = self.txt_total[best_vertex.string_number]
+        return self.alphabet.decode(txt[end_index - best_depth + 1:end_index + 1])
+
+    def suffix_array(self) -> tuple[array, array, array]:
+        """String numbers and starts of every suffix in sorted order plus the LCP array, from a lexicographic DFS"""
+        return suffix_and_lcp_arrays(self.ROOT)
 
-        dfs(vertex)
-        search_string_occurrence_indices = list(map(lambda leaf: (leaf.string_number, leaf.suffix_start_index),
-                                                    filter(lambda v: v.is_leaf(), visited)))
-        return search_string_occurrence_indices
+    def to_suffix_array_index(self) -> SuffixArrayIndex:
+        return SuffixArrayIndex(self.txt_total, self.alphabet, *suffix_and_lcp_arrays(self.ROOT), generalised=True)
 
 
 if __name__ == "__main__":
-    s1 = GeneralisedSuffixTree(2)
+    s1 = GeneralisedSuffixTree()
     s1.add_to_suffix_tree("abcabcbbbbbacabcab", 0)
     s1.add_to_suffix_tree("abastabc", 1)
-    # One can keep adding but must change constructor param to desired number
+    # One can keep adding strings, they are numbered in order of addition
     print(s1.search_for_match("abc"))
@@ -1,54 +1,118 @@
-import sys
+import argparse
+import functools
+import io
+import os
+import struct
+from typing import Iterable
 
-from generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.alphabet import CodePointAlphabet
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.parallel import ShardedGeneralisedSuffixTree, search_for_matches_parallel
 
+OUTPUT_BUFFER_SIZE = 1 << 20
+PATTERN_CHUNK_SIZE = 256  # patterns read and searched per batch
 
-def main() -> None:
-    """
-    Command line version of Ukkonen's
-    """
-    file_name: str = sys.argv[1]
-    inp_lst = []
-
-    with open(file_name) as file:
-        while line := file.readline():
-            inp_lst.append(line.rstrip("\n").split(" "))
-
-    number_of_text_files = int(inp_lst.pop(0)[0])
-    number_of_pattern_files = int(inp_lst.pop(number_of_text_files)[0])
+# one-indexed (pattern, text, offset) triplet to output record
+FORMATS = {
+    "text": lambda p, t, o: b"%d %d %d\n" % (p, t, o),
+    "ndjson": lambda p, t, o: b'{"pattern": %d, "text": %d, "offset": %d}\n' % (p, t, o),
+    "binary": struct.Struct("<3Q").pack,
+}
 
-    text_files = inp_lst[:number_of_text_files]
-    pattern_files = inp_lst[number_of_text_files:]
 
-    all_text_lst = [None] * number_of_text_files
-    all_pattern_lst = [None] * number_of_pattern_files
+def open_text(path: str, encoding: str = "utf-8"):
+    """Open `path` as bytes, decoded incrementally as it is read so the file is never held whole"""
+    return io.TextIOWrapper(open(path, "rb"), encoding=encoding, newline=None)
 
-    def read_by_line(files, lst):
-        for line in files:
-            with open(line[1]) as f:
-                lst[int(line[0])-1] = f.read()
 
-    read_by_line(text_files, all_text_lst)
-    read_by_line(pattern_files, all_pattern_lst)
+def read_manifest(file_name: str) -> tuple[list[str], list[str]]:
+    """Paths of the text files and pattern files, in the order of their one-indexed numbers"""
+    with open(file_name, "rb") as file:
+        lines = (line.rstrip(b"\r\n").decode() for line in file)
 
+        def read_section() -> list[str]:
+            paths = [""] * int(next(lines).split(" ")[0])
+            for _ in range(len(paths)):
+                number, path = next(lines).split(" ", 1)
+                paths[int(number) - 1] = path
+            return paths
 
-    all_text_lst = list(map(lambda x: x.lower(), all_text_lst))
-    all_pattern_lst = list(map(lambda x: x.lower(), all_pattern_lst))
+        return read_section(), read_section()
 
-    gst = GeneralisedSuffixTree(number_of_text_files)
 
-    for n, txt in enumerate(all_text_lst):
-        gst.add_to_suffix_tree(txt, n)
+def write_matches(output_file, record, pattern_number: int, matches: Iterable[tuple[int, int]]) -> None:
+    output_file.writelines(record(pattern_number + 1, string_number + 1, offset + 1)
+                           for string_number, offset in matches)
 
-    gst_triplets = []
-    for n, pat in enumerate(all_pattern_lst):
-        for pair in gst.search_for_match(pat):
-            gst_triplets.append((n, *pair))
 
-    gst_triplets_one_indexed = list(map(lambda t: tuple(map(lambda x: x+1, t)), gst_triplets))
-
-    with open("output_gst.txt", "w") as output_file:
-        output_file.writelines("{}\n".format(' '.join(map(str, el))) for el in gst_triplets_one_indexed)
+def main() -> None:
+    """
+    Command line version of Ukkonen's
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("file_name", help="file listing the text files and pattern files")
+    parser.add_argument("--workers", type=int, default=1, help="number of query processes sharing the tree")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="PATH",
+                        help="write build and query statistics as JSON to PATH, or stdout if no PATH is given "
+                             "(per-query timings need --workers 1)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="partition the text files across this many processes, each building its own tree; "
+                             "matches are then listed in (text, offset) order per pattern")
+    parser.add_argument("-o", "--output", default="output_gst.txt", help="where to write the matches")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="'text' lines of 'pattern text offset', one JSON object per line for 'ndjson', or "
+                             "three little-endian unsigned 64-bit integers per match for 'binary'")
+    parser.add_argument("--encoding", default="utf-8", help="encoding of the text and pattern files")
+    parser.add_argument("--case-sensitive", action="store_true", help="do not lowercase texts and patterns")
+    args = parser.parse_args()
+    if args.shards > 1 and args.stats is not None:
+        parser.error("--stats needs a single shard")
+
+    text_paths, pattern_paths = read_manifest(args.file_name)
+    read = functools.partial(open_text, encoding=args.encoding)
+    alphabet = CodePointAlphabet(fold_case=not args.case_sensitive)
+    record = FORMATS[args.format]
+
+    def read_pattern(path: str) -> str:
+        with read(path) as f:
+            return f.read()
+
+    def search_in_chunks(search_for_matches) -> None:
+        # a bounded batch of patterns at a time, each batch written out before the next is read
+        for first in range(0, len(pattern_paths), PATTERN_CHUNK_SIZE):
+            patterns = list(map(read_pattern, pattern_paths[first:first + PATTERN_CHUNK_SIZE]))
+            for n, matches in enumerate(search_for_matches(patterns), first):
+                write_matches(output_file, record, n, matches)
+
+    with open(args.output, "wb", buffering=OUTPUT_BUFFER_SIZE) as output_file:
+        if args.shards > 1:
+            # every shard streams its own text files, balanced by file size
+            with ShardedGeneralisedSuffixTree(text_paths, args.shards, read=read, alphabet=alphabet,
+                                              sizes=list(map(os.path.getsize, text_paths))) as sharded:
+                search_in_chunks(sharded.search_for_matches)
+            return
+
+        gst = GeneralisedSuffixTree(len(text_paths), alphabet)
+        if args.stats is not None:
+            gst.enable_stats()
+        for n, path in enumerate(text_paths):
+            with read(path) as f:
+                gst.build_from_stream(f, string_number=n)
+
+        if args.workers > 1:
+            patterns = list(map(read_pattern, pattern_paths))
+            for n, matches in enumerate(search_for_matches_parallel(gst, patterns, args.workers)):
+                write_matches(output_file, record, n, matches)
+        else:
+            search_in_chunks(gst.search_for_matches)
+
+    if args.stats is not None:
+        report = gst.stats.to_json(gst.ROOT, indent=2)
+        if args.stats == "-":
+            print(report)
+        else:
+            with open(args.stats, "w") as stats_file:
+                stats_file.write(report + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+"""
+Longest-prefix queries and matching statistics over a built tree
+
+The matching statistics of a query text give, for every offset i, the length of the longest prefix of text[i:] that
+occurs in the index. After offset i the match for offset i + 1 is found by following the suffix link of the deepest
+vertex passed and skip-counting back down, instead of walking again from the root, so the whole text takes time
+linear in its length.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Callable, Sequence
+
+from UkkonensSuffixTree.vertex import Vertex
+
+
+def longest_prefix_length(root: Vertex, txt_of: Callable[[Vertex], Sequence[int]], ranks: Sequence[int]) -> int:
+    """Number of leading ranks matched before the pattern diverges from every path of the tree"""
+    v, matched = root, 0
+    while matched < len(ranks):
+        child = v.get_child(ranks[matched])
+        if child is None: break
+        txt = txt_of(child)
+        for txt_idx in range(child.parent_edge_start_index, child.parent_edge_end_index + 1):
+            if matched == len(ranks) or txt[txt_idx] != ranks[matched]:
+                return matched
+            matched += 1
+        v = child
+    return matched
+
+
+def matching_statistics(root: Vertex, txt_of: Callable[[Vertex], Sequence[int]], ranks: Sequence[int]) -> array:
+    n = len(ranks)
+    lengths = array('q', [0]) * n
+    v, v_depth = root, 0  # deepest vertex on the current match and its string depth
+    matched = 0
+    for i in range(n):
+        # extend the match for offset i character by character
+        while i + matched < n:
+            child = v.get_child(ranks[i + v_depth])
+            if child is None: break
+            edge_idx = child.parent_edge_start_index + matched - v_depth
+            if txt_of(child)[edge_idx] != ranks[i + matched]: break
+            matched += 1
+            if matched - v_depth == child.length():
+                v, v_depth = child, matched
+        lengths[i] = matched
+        if matched == 0: continue
+
+        # the match for offset i + 1 is at least matched - 1 long: follow the suffix link, then skip-count down
+        matched -= 1
+        if v.is_root:
+            v_depth = 0
+        else:
+            v, v_depth = v.suffix_link, v_depth - 1
+        while matched > v_depth:
+            child = v.get_child(ranks[i + 1 + v_depth])
+            if child.length() > matched - v_depth: break
+            v, v_depth = child, v_depth + child.length()
+    return lengths
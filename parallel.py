@@ -0,0 +1,173 @@
+"""
+Multi-process query serving and index building
+
+`search_for_matches_parallel` serves queries over one read-only tree built (or loaded) once in the parent. With the
+`fork` start method workers inherit it copy-on-write; otherwise it is written once with `serialization.save` and every
+worker maps the same file, so the index is shared through the page cache instead of being pickled to each process.
+
+`ShardedGeneralisedSuffixTree` instead partitions the documents across worker processes, each building and keeping
+its own generalised tree, so the build runs on every core and no process holds more than its shard.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import tempfile
+from typing import Callable, Sequence
+
+from UkkonensSuffixTree import serialization
+from UkkonensSuffixTree.alphabet import Alphabet
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+
+_shared_tree = None
+
+
+def _share_tree(tree) -> None:
+    global _shared_tree
+    _shared_tree = tree
+
+
+def _load_tree(path: str) -> None:
+    _share_tree(serialization.load(path))
+
+
+def _search_chunk(chunk: tuple[list[int], list[str]]) -> tuple[list[int], list[list[tuple[int, int]]]]:
+    indices, search_strings = chunk
+    if hasattr(_shared_tree, "search_for_matches"):
+        return indices, _shared_tree.search_for_matches(search_strings)
+    return indices, [_shared_tree.search_for_match(search_string) for search_string in search_strings]
+
+
+def search_for_matches_parallel(tree, search_strings, workers: int, chunk_size: int | None = None,
+                                start_method: str | None = None) -> list[list[tuple[int, int]]]:
+    """
+    `search_for_matches` split across `workers` processes, results grouped per pattern in input order
+    Patterns are chunked in sorted order so each chunk keeps the prefix sharing of the batch search.
+    """
+    if workers <= 1 or len(search_strings) == 0:
+        return tree.search_for_matches(search_strings)
+    if start_method is None:
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(search_strings) // (workers * 4)))
+
+    order = sorted(range(len(search_strings)), key=search_strings.__getitem__)
+    chunks = [(order[i:i + chunk_size], [search_strings[idx] for idx in order[i:i + chunk_size]])
+              for i in range(0, len(order), chunk_size)]
+    results: list[list[tuple[int, int]]] = [[] for _ in search_strings]
+
+    context = multiprocessing.get_context(start_method)
+    index_path = None
+    if start_method == "fork":
+        _share_tree(tree)
+        initializer, initargs = None, ()
+    else:
+        fd, index_path = tempfile.mkstemp(suffix=".ukst")
+        os.close(fd)
+        serialization.save(tree, index_path)
+        initializer, initargs = _load_tree, (index_path,)
+    try:
+        with context.Pool(workers, initializer, initargs) as pool:
+            for indices, chunk_results in pool.imap_unordered(_search_chunk, chunks):
+                for idx, matches in zip(indices, chunk_results):
+                    results[idx] = matches
+    finally:
+        _share_tree(None)
+        if index_path is not None:
+            os.remove(index_path)
+    return results
+
+
+def _partition(sizes: Sequence[int], shards: int) -> list[list[int]]:
+    # largest document first into the currently smallest shard, keeping shard sizes within one document of each other
+    loads = [0] * shards
+    partition: list[list[int]] = [[] for _ in range(shards)]
+    for string_number in sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True):
+        shard = min(range(shards), key=loads.__getitem__)
+        partition[shard].append(string_number)
+        loads[shard] += sizes[string_number]
+    return [sorted(string_numbers) for string_numbers in partition if string_numbers]
+
+
+def _serve_shard(conn, documents: list, global_ids: list[int], read: Callable | None, alphabet: Alphabet | None) \
+        -> None:
+    try:
+        gst = GeneralisedSuffixTree(len(documents), alphabet)
+        for document in documents:
+            document = document if read is None else read(document)
+            if hasattr(document, "read"):
+                with document:
+                    gst.build_from_stream(document)
+            else:
+                gst.add_to_suffix_tree(document)
+    except Exception as e:
+        conn.send(e)
+        return
+    conn.send(None)
+    while (search_strings := conn.recv()) is not None:
+        conn.send([[(global_ids[string_number], offset) for string_number, offset in matches]
+                   for matches in gst.search_for_matches(search_strings)])
+    conn.close()
+
+
+class ShardedGeneralisedSuffixTree:
+    """
+    Documents partitioned across `shards` worker processes, each building its own `GeneralisedSuffixTree` in parallel
+    Queries are fanned out to every shard and merged, with string numbers remapped to the global numbering (the index
+    of the document in `documents`) and each pattern's matches sorted by (string number, offset).
+    When `read` is given, `documents` are whatever it takes (e.g. file paths) and each worker loads its own documents,
+    so the text never passes through the coordinating process. `read` may return the text or a file object to stream.
+    """
+
+    def __init__(self, documents: Sequence, shards: int, read: Callable | None = None,
+                 sizes: Sequence[int] | None = None, alphabet: Alphabet | None = None,
+                 start_method: str | None = None) -> None:
+        if sizes is None:
+            sizes = [1] * len(documents) if read is not None else [len(document) for document in documents]
+        context = multiprocessing.get_context(start_method)
+        self.shards: list[tuple] = []  # (connection, process, global string numbers) per shard
+        for global_ids in _partition(sizes, max(1, shards)):
+            conn, child_conn = context.Pipe()
+            process = context.Process(target=_serve_shard, daemon=True,
+                                      args=(child_conn, [documents[n] for n in global_ids], global_ids, read, alphabet))
+            process.start()
+            child_conn.close()
+            self.shards.append((conn, process, global_ids))
+        # shards build concurrently, wait for all of them
+        for conn, _, _ in self.shards:
+            error = conn.recv()
+            if error is not None:
+                self.close()
+                raise error
+
+    def __enter__(self) -> ShardedGeneralisedSuffixTree:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for conn, process, _ in self.shards:
+            try:
+                conn.send(None)
+                conn.close()
+            except (BrokenPipeError, OSError):
+                pass
+            process.join()
+        self.shards = []
+
+    def search_for_matches(self, search_strings) -> list[list[tuple[int, int]]]:
+        search_strings = list(search_strings)
+        for conn, _, _ in self.shards:
+            conn.send(search_strings)
+        results: list[list[tuple[int, int]]] = [[] for _ in search_strings]
+        for conn, _, _ in self.shards:
+            for merged, matches in zip(results, conn.recv()):
+                merged.extend(matches)
+        for matches in results:
+            matches.sort()
+        return results
+
+    def search_for_match(self, search_string) -> list[tuple[int, int]]:
+        """Search for exact substring matches (not suffix matches)"""
+        return self.search_for_matches([search_string])[0]
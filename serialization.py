@@ -0,0 +1,166 @@
+"""
+Versioned binary format for built trees, loaded through `mmap` without a deserialization pass
+
+Layout (native byte order, every section 8-byte aligned):
+    header      magic, version, byte order mark, kind, vertex count, string count, alphabet descriptor length
+    alphabet    JSON descriptor of the tree's `Alphabet`
+    string_end  'q' per string, index of the last character (the terminator) of each string
+    txt_offset  'q' per string + 1, start of each string within `txt`
+    columns     one section per `FlatTreeStorage.COLUMNS` entry, one item per vertex
+    txt         'I' ranks of every string, terminators included, concatenated
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from array import array
+
+from UkkonensSuffixTree.alphabet import Alphabet, ByteAlphabet, CodePointAlphabet, TokenAlphabet, UnicodeAlphabet
+from UkkonensSuffixTree.flat_suffix_tree import (NO_VERTEX, FlatGeneralisedSuffixTree, FlatSuffixTree,
+                                                 FlatTreeStorage, _FlatUkkonen)
+from UkkonensSuffixTree.generalised_suffix_tree import GeneralisedSuffixTree
+from UkkonensSuffixTree.suffix_tree import SuffixTree
+
+MAGIC = b"UKST"
+FORMAT_VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=4sIIIqqq")
+
+KIND_SINGLE = 0
+KIND_GENERALISED = 1
+
+JSON_SYMBOL_TYPES = (str, int, float, bool)
+
+
+def _alphabet_descriptor(alphabet: Alphabet) -> dict:
+    if isinstance(alphabet, UnicodeAlphabet):
+        # symbols are stored as JSON, which only gives back these types as they were (a tuple would load as a list)
+        for symbol in alphabet.symbols:
+            if symbol is not None and type(symbol) not in JSON_SYMBOL_TYPES:
+                raise TypeError(f"cannot serialize alphabet symbol {symbol!r} of type {type(symbol).__name__}")
+        return {"type": "unicode", "symbols": alphabet.symbols}
+    if isinstance(alphabet, ByteAlphabet):
+        return {"type": "bytes", "encoding": alphabet.encoding, "fold_case": alphabet.fold_case}
+    if isinstance(alphabet, TokenAlphabet):
+        return {"type": "tokens", "size": alphabet.size}
+    if isinstance(alphabet, CodePointAlphabet):
+        return {"type": "codepoint", "fold_case": alphabet.fold_case}
+    raise TypeError(f"cannot serialize alphabet {type(alphabet).__name__}")
+
+
+def _alphabet_from_descriptor(descriptor: dict) -> Alphabet:
+    kind = descriptor["type"]
+    if kind == "unicode":
+        return UnicodeAlphabet(descriptor["symbols"])
+    if kind == "bytes":
+        return ByteAlphabet(descriptor["encoding"], descriptor.get("fold_case", False))
+    if kind == "tokens":
+        return TokenAlphabet(descriptor["size"])
+    if kind == "codepoint":
+        return CodePointAlphabet(descriptor.get("fold_case", False))
+    raise ValueError(f"unknown alphabet type {kind!r}")
+
+
+def _columns_from_vertices(root) -> dict[str, array]:
+    # Number `Vertex` objects in pre-order, children in rank order so search output order is preserved
+    columns = {name: array(typecode) for name, typecode in FlatTreeStorage.COLUMNS}
+    vertex_ids = {}
+    order = []
+    stack = [root]
+    while stack:
+        v = stack.pop()
+        vertex_ids[id(v)] = len(order)
+        order.append(v)
+        if v.children is not None:
+            stack.extend(reversed([*v.children]))
+
+    columns["next_sibling"] = array('i', [NO_VERTEX]) * len(order)
+    for v in order:
+        is_leaf = v.is_leaf() and not v.is_root
+        columns["edge_start"].append(0 if v.is_root else v.parent_edge_start_index)
+        columns["edge_end"].append(NO_VERTEX if v.is_root or is_leaf else v.parent_edge_end_index)
+        columns["string_number"].append(v.string_number or 0)
+        columns["suffix_link"].append(NO_VERTEX if v.suffix_link is None else vertex_ids[id(v.suffix_link)])
+        columns["suffix_start"].append(v.suffix_start_index if is_leaf else NO_VERTEX)
+        children = [] if v.children is None else [vertex_ids[id(child)] for child in v.children]
+        columns["first_child"].append(children[0] if children else NO_VERTEX)
+        for left, right in zip(children, children[1:]):
+            columns["next_sibling"][left] = right
+    return columns
+
+
+def _pad(n: int) -> bytes:
+    return b"\0" * (-n % 8)
+
+
+def save(tree, path: str) -> None:
+    """Write a `SuffixTree`, `GeneralisedSuffixTree` or flat tree to `path`"""
+    if isinstance(tree, _FlatUkkonen):
+        kind = KIND_SINGLE if isinstance(tree, FlatSuffixTree) else KIND_GENERALISED
+        columns = {name: getattr(tree.store, name) for name, _ in FlatTreeStorage.COLUMNS}
+        texts = tree.store.txt_total
+        string_end = array('q', tree.store.string_end)
+    elif isinstance(tree, (SuffixTree, GeneralisedSuffixTree)):
+        kind = KIND_SINGLE if isinstance(tree, SuffixTree) else KIND_GENERALISED
+        columns = _columns_from_vertices(tree.ROOT)
+        texts = [tree.txt_total] if kind == KIND_SINGLE else tree.txt_total
+        string_end = array('q', [len(txt) - 1 for txt in texts])
+    else:
+        raise TypeError(f"cannot serialize {type(tree).__name__}")
+
+    txt_offset = array('q', [0])
+    for txt in texts:
+        txt_offset.append(txt_offset[-1] + len(txt))
+    alphabet = json.dumps(_alphabet_descriptor(tree.alphabet)).encode()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, kind, len(columns["edge_start"]), len(texts),
+                            len(alphabet)))
+        f.write(_pad(HEADER.size))
+        f.write(alphabet + _pad(len(alphabet)))
+        for section in (string_end, txt_offset, *(array(typecode, columns[name])
+                                                  for name, typecode in FlatTreeStorage.COLUMNS)):
+            f.write(section.tobytes() + _pad(section.itemsize * len(section)))
+        for txt in texts:
+            f.write(array('I', txt).tobytes())
+
+
+def load(path: str) -> FlatSuffixTree | FlatGeneralisedSuffixTree:
+    """
+    Map the file at `path` read-only and return a flat tree whose columns are memoryviews over the mapping
+    The returned tree answers queries directly from the page cache and cannot be extended.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    magic, version, byte_order_mark, kind, number_of_vertices, number_of_strings, alphabet_length = \
+        HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a suffix tree file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported suffix tree format version {version}")
+    if byte_order_mark != BYTE_ORDER_MARK:
+        raise ValueError(f"{path} was written with a different byte order")
+
+    offset = HEADER.size + len(_pad(HEADER.size))
+    alphabet = _alphabet_from_descriptor(json.loads(bytes(view[offset:offset + alphabet_length])))
+    offset += alphabet_length + len(_pad(alphabet_length))
+
+    def section(typecode: str, count: int) -> memoryview:
+        nonlocal offset
+        size = array(typecode).itemsize * count
+        mapped = view[offset:offset + size].cast(typecode)
+        offset += size + len(_pad(size))
+        return mapped
+
+    string_end = section('q', number_of_strings)
+    txt_offset = section('q', number_of_strings + 1)
+    columns = {name: section(typecode, number_of_vertices) for name, typecode in FlatTreeStorage.COLUMNS}
+    txt = section('I', txt_offset[number_of_strings])
+    txt_total = [txt[txt_offset[n]:txt_offset[n + 1]] for n in range(number_of_strings)]
+
+    store = FlatTreeStorage.from_columns(txt_total, string_end, columns)
+    store.buffer = buffer  # keeps the mapping alive for as long as the tree
+    cls = FlatSuffixTree if kind == KIND_SINGLE else FlatGeneralisedSuffixTree
+    return cls.from_storage(store, alphabet)
@@ -0,0 +1,110 @@
+"""
+Opt-in build and query instrumentation
+
+Nothing here runs unless `enable_stats()` was called on a tree: with stats off the plain search is untouched and the
+builders only keep a few local counters. With stats on, each build is timed around whichever builder the tree uses,
+whose counters are added to `tree.stats` at the end, and `search_for_match` is timed per query.
+"""
+from __future__ import annotations
+
+import json
+import statistics
+import sys
+
+from UkkonensSuffixTree.dict import AlphabetDict, InlineChildMap, SortedChildMap
+from UkkonensSuffixTree.vertex import Vertex
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_bytes() -> int | None:
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kilobytes everywhere but macOS
+
+
+def count_vertices(root: Vertex) -> dict[str, int]:
+    """Vertices by type and child maps by representation"""
+    counts = {"internal": 0, "leaf": 0, "inline_child_maps": 0, "sorted_child_maps": 0, "dense_child_maps": 0}
+    for v in root.iter_post_order():
+        if v.children is None:
+            counts["leaf"] += not v.is_root
+            continue
+        counts["internal"] += not v.is_root
+        if isinstance(v.children, AlphabetDict):
+            counts["dense_child_maps"] += 1
+        elif isinstance(v.children, SortedChildMap):
+            counts["sorted_child_maps"] += 1
+        elif isinstance(v.children, InlineChildMap):
+            counts["inline_child_maps"] += 1
+    return counts
+
+
+class TreeStats:
+    """Counters filled in while attached to a tree as `tree.stats`"""
+
+    def __init__(self) -> None:
+        # build
+        self.phases: int = 0
+        self.rule_1_extensions: int = 0  # leaf extensions, done implicitly by the global end
+        self.rule_2_leaf_extensions: int = 0
+        self.rule_2_splits: int = 0
+        self.rule_3_extensions: int = 0
+        self.skip_count_hops: int = 0
+        self.suffix_link_walks: int = 0
+        self.build_seconds: float = 0.0
+        self.peak_rss_bytes: int | None = None
+
+        # queries, one entry per `search_for_match` call
+        self.query_seconds: list[float] = []
+        self.query_edges: list[int] = []
+        self.query_matches: list[int] = []
+
+    def record_extension(self, rule: int, split: bool, at_root: bool) -> None:
+        if rule == 3:
+            self.rule_3_extensions += 1
+            return
+        if split:
+            self.rule_2_splits += 1
+        else:
+            self.rule_2_leaf_extensions += 1
+        if not at_root:
+            self.suffix_link_walks += 1  # the next extension starts from the suffix link of the active vertex
+
+    def record_query(self, seconds: float, edges_visited: int, matches: int) -> None:
+        self.query_seconds.append(seconds)
+        self.query_edges.append(edges_visited)
+        self.query_matches.append(matches)
+
+    def to_dict(self, root: Vertex | None = None, per_query: bool = False) -> dict:
+        report = {
+            "build": {
+                "phases": self.phases,
+                "extensions": {"rule_1": self.rule_1_extensions, "rule_2_leaf": self.rule_2_leaf_extensions,
+                               "rule_2_split": self.rule_2_splits, "rule_3": self.rule_3_extensions},
+                "skip_count_hops": self.skip_count_hops,
+                "suffix_link_walks": self.suffix_link_walks,
+                "seconds": self.build_seconds,
+                "peak_rss_bytes": self.peak_rss_bytes,
+            },
+            "queries": {"count": len(self.query_seconds), "seconds": sum(self.query_seconds),
+                        "edges_visited": sum(self.query_edges), "matches": sum(self.query_matches)},
+        }
+        if self.query_seconds:
+            ordered = sorted(self.query_seconds)
+            report["queries"].update(mean_seconds=statistics.fmean(ordered),
+                                     p50_seconds=ordered[len(ordered) // 2],
+                                     p99_seconds=ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)],
+                                     max_seconds=ordered[-1])
+        if per_query:
+            report["queries"]["per_query"] = [{"seconds": s, "edges_visited": e, "matches": m} for s, e, m in
+                                              zip(self.query_seconds, self.query_edges, self.query_matches)]
+        if root is not None:
+            report["vertices"] = count_vertices(root)
+        return report
+
+    def to_json(self, root: Vertex | None = None, per_query: bool = False, indent: int | None = None) -> str:
+        return json.dumps(self.to_dict(root, per_query), indent=indent)
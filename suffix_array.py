@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from UkkonensSuffixTree.alphabet import Alphabet
+from UkkonensSuffixTree.vertex import Vertex
+
+
+def suffix_and_lcp_arrays(root: Vertex) -> tuple[array, array, array]:
+    """
+    Lexicographic DFS over the children of `root`, returning the string number and start of every suffix in sorted
+    order, and the LCP array (longest common prefix of each suffix with the one before it)
+    Terminators rank above every symbol, so a suffix sorts after the suffixes it is a proper prefix of.
+    """
+    string_numbers, suffix_starts, lcp = array('i'), array('q'), array('q')
+    shallowest = 0  # string depth of the shallowest vertex passed since the previous leaf
+    stack = [(root, 0, 0)]
+    while stack:
+        v, depth, parent_depth = stack.pop()
+        shallowest = min(shallowest, parent_depth)
+        if v.children is None:
+            if not v.is_root:
+                string_numbers.append(v.string_number or 0)
+                suffix_starts.append(v.suffix_start_index)
+                lcp.append(shallowest)
+            shallowest = depth
+        else:
+            stack.extend((child, depth + child.length(), depth) for child in reversed([*v.children]))
+    return string_numbers, suffix_starts, lcp
+
+
+class SuffixArrayIndex:
+    """
+    Read-only index answering the `search_for_match` contract of the tree it was exported from,
+    by binary search over a suffix array instead of walking vertices
+    """
+
+    def __init__(self, txt_total: list[array], alphabet: Alphabet, string_numbers: array, suffix_starts: array,
+                 lcp: array, generalised: bool) -> None:
+        self.txt_total: list[array] = txt_total
+        self.alphabet: Alphabet = alphabet
+        self.string_numbers: array = string_numbers
+        self.suffix_starts: array = suffix_starts
+        self.lcp: array = lcp
+        self.generalised: bool = generalised
+
+    def __len__(self) -> int:
+        return len(self.suffix_starts)
+
+    def nbytes(self) -> int:
+        columns = (self.string_numbers, self.suffix_starts, self.lcp, *self.txt_total)
+        return sum(col.itemsize * len(col) for col in columns)
+
+    def _range(self, search_string) -> range:
+        # suffixes whose first len(search_string) ranks equal the pattern form one contiguous run
+        ranks = self.alphabet.encode_query(search_string)
+        if any(rank < 0 for rank in ranks): return range(0)
+        pattern = array('I', ranks)
+        m = len(pattern)
+        txt_total, string_numbers, suffix_starts = self.txt_total, self.string_numbers, self.suffix_starts
+
+        def prefix(i: int) -> array:
+            start = suffix_starts[i]
+            return txt_total[string_numbers[i]][start:start + m]
+
+        lo = bisect_left(range(len(self)), pattern, key=prefix)
+        hi = bisect_right(range(len(self)), pattern, lo=lo, key=prefix)
+        return range(lo, hi)
+
+    def count(self, search_string) -> int:
+        return len(self._range(search_string))
+
+    def search_for_match(self, search_string) -> list:
+        """Search for exact substring matches (not suffix matches)"""
+        matches = self._range(search_string)
+        if self.generalised:
+            return [(self.string_numbers[i], self.suffix_starts[i]) for i in matches]
+        return [self.suffix_starts[i] for i in matches]
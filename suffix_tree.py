@@ -1,6 +1,18 @@
 from __future__ import annotations
 
+import time
+from array import array
+from itertools import islice
+from typing import Iterator
+
+from UkkonensSuffixTree.alphabet import Alphabet, CodePointAlphabet
+from UkkonensSuffixTree.approximate import iter_edit_loci, iter_mismatch_loci
+from UkkonensSuffixTree.cache import QueryCache
+from UkkonensSuffixTree.fm_index import FMIndex
+from UkkonensSuffixTree.matching import longest_prefix_length, matching_statistics
 from UkkonensSuffixTree.pointer_int import Pointer
+from UkkonensSuffixTree.stats import TreeStats, peak_rss_bytes
+from UkkonensSuffixTree.suffix_array import SuffixArrayIndex, suffix_and_lcp_arrays
 from UkkonensSuffixTree.active_information import ActiveInformation
 from UkkonensSuffixTree.vertex import Vertex
 
@@ -8,36 +20,178 @@ from UkkonensSuffixTree.vertex import Vertex
 class SuffixTree:
     """
     Ukkonen's linear-time implicit suffix tree construction
-    Accepts single strings, with the terminal character being `$` (do not use this character in input)
+    Accepts single strings (or any input the `alphabet` can encode), the terminal character is
+    `Alphabet.terminal()`, which ranks above every symbol so no input character is reserved
     """
 
-    def __init__(self) -> None:
-        self.txt_total: list = []
+    def __init__(self, alphabet: Alphabet | None = None, fast_build: bool = True) -> None:
+        self.fast_build: bool = fast_build
+        self.alphabet: Alphabet = CodePointAlphabet() if alphabet is None else alphabet
+        self.txt_total: array = array('I')
         self.end: Pointer | None = None
         self.ROOT: Vertex = Vertex.create_root()
+        self.annotated: bool = False
+        self.terminated: bool = False
+        self.version: int = 0  # bumped by every mutation, invalidating cached query results
+        self.cache: QueryCache | None = None
+        self.stats: TreeStats | None = None
+
+        # Ukkonen state kept between `extend` calls
+        self._active_info: ActiveInformation = ActiveInformation(self.ROOT)
+        self._pending_vertex: Vertex | None = None
+        self._last_j: int = -1
 
     def add_to_suffix_tree(self, txt: str) -> None:
-        self._do_ukkonen(txt)
+        self.extend(txt)
+        self.finish()
+
+    def extend(self, chunk) -> None:
+        """Append the next chunk of input, running its phases online; queries are only complete after `finish`"""
+        assert not self.terminated, "input has already been terminated"
+        self.version += 1
+        first_phase = len(self.txt_total)
+        self.txt_total.extend(self.alphabet.encode(chunk))
+        self._do_ukkonen(first_phase)
+
+    def finish(self) -> None:
+        """Append the terminal character, turning the implicit tree into a suffix tree"""
+        self.version += 1
+        first_phase = len(self.txt_total)
+        self.txt_total.append(self.alphabet.terminal())  # adding terminal character
+        self._do_ukkonen(first_phase)
+        self.terminated = True
+
+    def build_from_stream(self, fileobj, chunk_size: int = 1 << 16) -> None:
+        """Index everything `fileobj.read` returns, holding only one chunk of decoded input at a time"""
+        while chunk := fileobj.read(chunk_size):
+            self.extend(chunk)
+        self.finish()
 
-    def _do_ukkonen(self, txt: str) -> None:
-        self.txt_total = list(map(ord, [*txt])) + [ord("$")]  # adding terminal character
-        self.end = Pointer()
-        active_info = ActiveInformation(self.ROOT)
-        pending_vertex = None
-        last_j = -1
+    def _do_ukkonen(self, txt_start_idx: int) -> None:
+        self.annotated = False
+        if self.end is None:
+            self.end = Pointer()
+        stats = self.stats
+        build_start = time.perf_counter()
+        if self.fast_build:
+            self._do_ukkonen_fast(txt_start_idx)
+        else:
+            self._do_ukkonen_reference(txt_start_idx)
+        if stats is not None:
+            stats.build_seconds += time.perf_counter() - build_start
+            stats.peak_rss_bytes = peak_rss_bytes()
+
+    def _do_ukkonen_reference(self, txt_start_idx: int) -> None:
+        stats = self.stats
+        active_info, pending_vertex, last_j = self._active_info, self._pending_vertex, self._last_j
 
-        txt_start_idx = len(self.txt_total) - len(txt) - 1
         for phase in range(txt_start_idx, len(self.txt_total)):
             self.end.increment()  # leaf extension
+            if stats is not None:
+                stats.phases += 1
+                stats.rule_1_extensions += last_j + 1
             j = last_j + 1
             while j <= phase:
                 active_info = self._traverse(active_info)
                 rule, active_info, pending_vertex = self._do_extension(active_info, pending_vertex, j, phase)
+                if stats is not None:
+                    stats.record_extension(rule, pending_vertex is not None, active_info.vertex.is_root)
                 if rule == 3: break  # stop prematurely
                 if rule == 2: last_j += 1
                 j = last_j + 1
                 active_info = SuffixTree._maybe_move_to_next_extension(active_info, rule)
 
+        self._active_info, self._pending_vertex, self._last_j = active_info, pending_vertex, last_j
+
+    def _do_ukkonen_fast(self, txt_start_idx: int) -> None:
+        # Same phases and extensions as the method-per-step builder above, with the active point held in locals,
+        # the global end read as the phase number and every child looked up once
+        txt = self.txt_total
+        root, end = self.ROOT, self.end
+        active_info = self._active_info
+        active_vertex, start_index, end_index = active_info.vertex, active_info.start_index, active_info.end_index
+        pending_vertex, last_j = self._pending_vertex, self._last_j
+        first_j, rule_1, splits, rule_3, hops, walks = last_j, 0, 0, 0, 0, 0  # counters for `self.stats`
+
+        for phase in range(txt_start_idx, len(txt)):
+            end.v = phase  # leaf extension
+            char = txt[phase]
+            j = last_j + 1
+            rule_1 += j
+            while j <= phase:
+                # skip-count down to the extension point
+                vertex_below = None
+                while start_index != end_index:
+                    vertex_below = active_vertex.children[txt[start_index]]
+                    edge_end = phase if vertex_below.children is None else vertex_below._parent_edge_end_index
+                    edge_length = edge_end - vertex_below.parent_edge_start_index + 1
+                    if edge_length > end_index - start_index:
+                        break
+                    active_vertex = vertex_below
+                    start_index += edge_length
+                    hops += 1
+                    vertex_below = None
+
+                if vertex_below is None:
+                    children = active_vertex.children
+                    if children is not None and children[char] is not None:
+                        # rule 3 - matching character at start of edge
+                        if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                        pending_vertex = None
+                        end_index += 1
+                        rule_3 += 1
+                        break
+                    # rule 2 - no edge split
+                    leaf = Vertex(None, phase, end)
+                    leaf.suffix_start_index = j
+                    active_vertex.add_child(leaf, char)
+                    if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                    pending_vertex = None
+                else:
+                    below_start = vertex_below.parent_edge_start_index
+                    mismatch_edge_idx = below_start + end_index - start_index
+                    if txt[mismatch_edge_idx] == char:
+                        # rule 3 - matching character on existing edge
+                        if pending_vertex is not None: pending_vertex.suffix_link = active_vertex
+                        pending_vertex = None
+                        end_index += 1
+                        rule_3 += 1
+                        break
+                    # rule 2 - edge split
+                    new_vert = Vertex(None, below_start, mismatch_edge_idx - 1)
+                    active_vertex.children[txt[below_start]] = new_vert
+                    new_vert.add_child(vertex_below, txt[mismatch_edge_idx])
+                    vertex_below.parent_edge_start_index = mismatch_edge_idx
+                    leaf = Vertex(None, phase, end)
+                    leaf.suffix_start_index = j
+                    new_vert.add_child(leaf, char)
+                    if pending_vertex is not None: pending_vertex.suffix_link = new_vert
+                    pending_vertex = new_vert
+                    splits += 1
+
+                last_j += 1
+                j = last_j + 1
+                # move to next extension i.e. traversing suffix links
+                if active_vertex is root:
+                    if start_index == end_index:
+                        end_index += 1
+                    start_index += 1
+                else:
+                    walks += 1
+                active_vertex = active_vertex.suffix_link
+
+        active_info.vertex, active_info.start_index, active_info.end_index = active_vertex, start_index, end_index
+        self._pending_vertex, self._last_j = pending_vertex, last_j
+        stats = self.stats
+        if stats is not None:
+            stats.phases += len(txt) - txt_start_idx
+            stats.rule_1_extensions += rule_1
+            stats.rule_2_leaf_extensions += last_j - first_j - splits
+            stats.rule_2_splits += splits
+            stats.rule_3_extensions += rule_3
+            stats.skip_count_hops += hops
+            stats.suffix_link_walks += walks
+
     def _traverse(self, active_info: ActiveInformation) -> ActiveInformation:
         # Skip-count down to the extension point
 
@@ -47,6 +201,7 @@ class SuffixTree:
                 break
             active_info.vertex = temp_vertex
             active_info.increase_start_index(temp_vertex.length())
+            if self.stats is not None: self.stats.skip_count_hops += 1
 
         return active_info
 
@@ -122,10 +277,57 @@ class SuffixTree:
         active_vertex.add_child(Vertex.create_leaf(self.end, extension), self.txt_total[end_index])
         return active_vertex
 
+    def enable_cache(self, max_entries: int | None = 1024, max_bytes: int | None = None) -> QueryCache:
+        """Opt in to an LRU cache of query results, emptied whenever the tree is mutated"""
+        self.cache = QueryCache(max_entries, max_bytes)
+        return self.cache
+
+    def enable_stats(self) -> TreeStats:
+        """Opt in to build and query counters, see `UkkonensSuffixTree.stats`; builds from here on are counted"""
+        self.stats = TreeStats()
+        return self.stats
+
+    def _cached_query(self, kind: str, search_string, query):
+        if self.cache is None: return query(search_string)
+        self.cache.sync(self.version)
+        key = (kind, search_string if isinstance(search_string, (str, bytes)) else tuple(search_string))
+        result = self.cache.get(key)
+        if result is None:
+            result = query(search_string)
+            self.cache.put(key, result)
+        return list(result) if isinstance(result, list) else result
+
+    def _search_cached_locus(self, search_string_lst: list[int]) -> Vertex | None:
+        # resume from the locus of the longest already matched prefix, then remember this pattern's locus too
+        self.cache.sync(self.version)
+        ranks = tuple(search_string_lst)
+        length, locus = self.cache.longest_cached_prefix(ranks)
+        if locus is None:
+            locus = (self.ROOT, 0)
+        for char in ranks[length:]:
+            locus = self._step(locus, char)
+            if locus is None: return None
+        if length < len(ranks):
+            self.cache.put(("locus", ranks), locus)
+        return locus[0]
+
+    def _step(self, locus: tuple[Vertex, int], char: int) -> tuple[Vertex, int] | None:
+        # Advance a (vertex, next edge index) locus by one character, None on mismatch
+        vertex, txt_idx = locus
+        if vertex.is_root or txt_idx > vertex.parent_edge_end_index:
+            child = vertex.get_child(char)
+            return None if child is None else (child, child.parent_edge_start_index + 1)
+        if self.txt_total[txt_idx] != char:
+            return None
+        return vertex, txt_idx + 1
+
     def _search_for_final_matching_vertex(self, search_string: str) -> Vertex | None:
+        return self._search_for_final_matching_ranks(self.alphabet.encode_query(search_string))
+
+    def _search_for_final_matching_ranks(self, search_string_lst: list[int]) -> Vertex | None:
+        if self.cache is not None: return self._search_cached_locus(search_string_lst)
         current_vertex = self.ROOT
         search_string_idx = 0
-        search_string_lst = list(map(ord, [*search_string]))
         while search_string_idx < len(search_string_lst):
             current_vertex = current_vertex.get_child(search_string_lst[search_string_idx])
             if current_vertex is None:
@@ -139,25 +341,104 @@ class SuffixTree:
         return current_vertex
 
     def search_for_suffix_match(self, search_string: str):
-        vertex = self._search_for_final_matching_vertex(search_string + "$")
+        vertex = self._search_for_final_matching_ranks(
+            self.alphabet.encode_query(search_string) + [self.alphabet.terminal()])
         return None if vertex is None else vertex.parent_edge_start_index
 
+    def iter_matches(self, search_string, limit: int | None = None) -> Iterator[int]:
+        """Lazily yield exact substring matches, stopping after `limit` of them"""
+        vertex = self._search_for_final_matching_vertex(search_string)
+        if vertex is None: return
+        for leaf in islice(vertex.iter_leaves(), limit):
+            yield leaf.suffix_start_index
+
     def search_for_match(self, search_string) -> list[int]:
         """Search for exact substring matches (not suffix matches)"""
+        if self.stats is not None: return self._search_for_match_timed(search_string)
+        return self._cached_query("match", search_string, lambda pattern: list(self.iter_matches(pattern)))
+
+    def is_substring(self, search_string) -> bool:
+        return self._search_for_final_matching_vertex(search_string) is not None
+
+    def longest_prefix_match(self, search_string) -> int:
+        """Length of the longest prefix of `search_string` occurring in the index, i.e. how far it matches"""
+        return longest_prefix_length(self.ROOT, lambda v: self.txt_total, self.alphabet.encode_query(search_string))
+
+    def matching_statistics(self, txt) -> array:
+        """
+        For every offset i of `txt`, the length of the longest prefix of txt[i:] occurring in the index,
+        in time linear in `len(txt)` by following suffix links
+        """
+        return matching_statistics(self.ROOT, lambda v: self.txt_total, self.alphabet.encode_query(txt))
+
+    def search_approximate(self, search_string, max_mismatches: int = 1) -> list[tuple[int, int, int]]:
+        """Substring matches with at most `max_mismatches` substitutions, as (string number, offset, distance)"""
+        loci = iter_mismatch_loci(self.ROOT, lambda v: self.txt_total, self.alphabet.encode_query(search_string),
+                                  max_mismatches)
+        return [(0, leaf.suffix_start_index, distance) for locus, distance in loci for leaf in locus.iter_leaves()]
+
+    def search_edit_distance(self, search_string, max_edits: int = 1) -> list[tuple[int, int, int]]:
+        """
+        Offsets where a substring within edit distance `max_edits` of `search_string` starts, as
+        (string number, offset, distance) with the smallest distance over the substrings starting there
+        """
+        loci = iter_edit_loci(self.ROOT, lambda v: self.txt_total, self.alphabet.encode_query(search_string), max_edits)
+        return [(0, leaf.suffix_start_index, distance) for locus, distance in loci for leaf in locus.iter_leaves()]
+
+    def _search_for_match_timed(self, search_string) -> list[int]:
+        start = time.perf_counter()
+        locus, edges_visited = (self.ROOT, 0), 0
+        for char in self.alphabet.encode_query(search_string):
+            vertex, locus = locus[0], self._step(locus, char)
+            if locus is None: break
+            edges_visited += locus[0] is not vertex
+        matches = [] if locus is None else [leaf.suffix_start_index for leaf in locus[0].iter_leaves()]
+        self.stats.record_query(time.perf_counter() - start, edges_visited, len(matches))
+        return matches
+
+    def annotate_counts(self) -> None:
+        """Post-build pass storing the number of leaves below every vertex, so `count` runs in pattern-length time"""
+        for v in self.ROOT.iter_post_order():
+            if v.children is None:
+                v.leaf_count = 0 if v.is_root else 1
+            else:
+                v.leaf_count = sum(child.leaf_count for child in v.children)
+        self.annotated = True
+
+    def count(self, search_string) -> int:
+        """Number of exact substring matches, without enumerating them once `annotate_counts` has run"""
+        return self._cached_query("count", search_string, self._count)
+
+    def _count(self, search_string) -> int:
         vertex = self._search_for_final_matching_vertex(search_string)
-        visited = []
-        if vertex is None: return visited
-
-        def dfs(v):
-            visited.append(v)
-            if v.children is not None:
-                for child in v.children:
-                    dfs(child)
-
-        dfs(vertex)
-        search_string_occurrence_indices = list(map(lambda leaf: leaf.suffix_start_index,
-                                                    filter(lambda v: v.is_leaf(), visited)))
-        return search_string_occurrence_indices
+        if vertex is None: return 0
+        if self.annotated: return vertex.leaf_count
+        return sum(1 for _ in vertex.iter_leaves())
+
+    def longest_repeated_substring(self):
+        """Longest substring occurring at least twice, i.e. the path label of the deepest internal vertex"""
+        best_vertex, best_depth = None, 0
+        stack = [(self.ROOT, 0)]
+        while stack:
+            v, depth = stack.pop()
+            if v.children is None: continue
+            if depth > best_depth:
+                best_vertex, best_depth = v, depth
+            stack.extend((child, depth + child.length()) for child in v.children)
+        if best_vertex is None: return self.alphabet.decode([])
+        end_index = best_vertex.parent_edge_end_index
+        return self.alphabet.decode(self.txt_total[end_index - best_depth + 1:end_index + 1])
+
+    def suffix_array(self) -> tuple[array, array]:
+        """Starts of every suffix in sorted order plus the LCP array, from a lexicographic DFS"""
+        _, suffix_starts, lcp = suffix_and_lcp_arrays(self.ROOT)
+        return suffix_starts, lcp
+
+    def to_suffix_array_index(self) -> SuffixArrayIndex:
+        return SuffixArrayIndex([self.txt_total], self.alphabet, *suffix_and_lcp_arrays(self.ROOT), generalised=False)
+
+    def to_fm_index(self, sample_rate: int = 32, occ_rate: int = 256) -> FMIndex:
+        return FMIndex.from_suffix_tree(self, sample_rate, occ_rate)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from UkkonensSuffixTree.dict import AlphabetDict
+from typing import Iterator
+
+from UkkonensSuffixTree.dict import AlphabetDict, InlineChildMap, SortedChildMap
 from UkkonensSuffixTree.pointer_int import Pointer
 
 
@@ -8,7 +10,7 @@ class Vertex:
 
     def __init__(self, string_number, start_idx, end_idx):
         self.is_root: bool = False
-        self.children: AlphabetDict | None = None
+        self.children: InlineChildMap | SortedChildMap | AlphabetDict | None = None
 
         self.parent_edge_start_index: int = start_idx
         self._parent_edge_end_index: Pointer | int = end_idx
@@ -19,22 +21,32 @@ class Vertex:
         # only exists on leaf nodes
         self.suffix_start_index: int | None = None
 
+        # only set by the optional post-build count annotation
+        self.leaf_count: int | None = None
+        self.document_count: int | None = None
+
     @property
     def parent_edge_end_index(self):
         if self.is_root: Exception("Do not ask for parent edge of root")
         return self._parent_edge_end_index.get_value() if self.is_leaf() else self._parent_edge_end_index
 
     def get_child(self, child_first_char) -> Vertex | None:
-        if self.children is None or child_first_char not in self.children: return None
+        if self.children is None: return None
         return self.children[child_first_char]
 
     def add_child(self, child: Vertex, child_first_char: int) -> None:
+        # children start as a tiny inline map and are promoted as fan-out grows
         if self.children is None:
-            self.children = AlphabetDict()
+            self.children = InlineChildMap()
+        elif self.children.is_full() and child_first_char not in self.children:
+            self.children = self.children.grow()
         self.children[child_first_char] = child
 
     def remove_child(self, child_first_char: int) -> None:
-        return self.children.pop(child_first_char)
+        child = self.children.pop(child_first_char)
+        if self.children.is_sparse():
+            self.children = self.children.shrink()
+        return child
 
     def is_child_present(self, child_first_char: int) -> bool:
         if self.children is None:
@@ -44,6 +56,29 @@ class Vertex:
     def is_leaf(self) -> bool:
         return self.children is None
 
+    def iter_post_order(self) -> Iterator[Vertex]:
+        # children are yielded before their parent, without recursion
+        stack = [(self, False)]
+        while stack:
+            v, expanded = stack.pop()
+            if expanded or v.children is None:
+                yield v
+            else:
+                stack.append((v, True))
+                stack.extend((child, False) for child in v.children)
+
+    def iter_leaves(self) -> Iterator[Vertex]:
+        # explicit stack of child iterators, so memory is proportional to depth and not to subtree size
+        stack = [iter((self,))]
+        while stack:
+            v = next(stack[-1], None)
+            if v is None:
+                stack.pop()
+            elif v.is_leaf():
+                yield v
+            else:
+                stack.append(iter(v.children))
+
     def length(self) -> int:
         if self.is_root: return 0
         return self.parent_edge_end_index - self.parent_edge_start_index + 1